@@ -0,0 +1,322 @@
+''' Benchmarks for the generation hot paths.
+
+    python benchmarks/benchmarks.py
+    python benchmarks/benchmarks.py --output results.json
+    python benchmarks/benchmarks.py --compare benchmarks/baseline.json
+
+Everything is seeded and nothing touches the network, so every run does
+the same work and results are only affected by the machine and the code.
+Times are in seconds per operation. The quick benchmarks are timed over
+many short runs, in several rounds, and each time is the best of all of
+them, so a slow patch on a busy machine doesn't count. With --compare,
+anything slower than the baseline by more than the tolerance is listed, as
+is anything the baseline has that the run doesn't, and the exit status is
+1, so an upgrade can be gated on it. Absolute numbers only mean something
+next to a baseline from the same machine.
+'''
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+# run from a checkout, without installing the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from foreigntongue import Language, Syllables, get_latin, get_ipa
+from foreigntongue import export
+from foreigntongue.syllable import pick_letter
+
+SEED = 0
+SIZES = [1000, 100000, 1000000]
+# how many times the quick benchmarks are run
+ROUNDS = 5
+# dictionaries up to this size count as quick
+QUICK_SIZE = 10000
+
+# the tag sets words are inflected across
+TAG_SETS = [('NN', []), ('NN', ['singular']), ('NN', ['plural']),
+            ('VB', ['present']), ('VB', ['past']), ('VB', ['future']),
+            ('JJ', [])]
+
+
+def best(function, number, repeat=50):
+    ''' the fastest time per call of a function, in seconds. Many short
+    runs find the machine's fastest moments better than a few long ones,
+    so number should keep each run to a few milliseconds '''
+    timer = timeit.Timer(function)
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def bench_syllables():
+    ''' building a phonology, and drawing letters and syllables from it,
+    letter by letter and from a syllable inventory '''
+    rng = random.Random(SEED)
+    syllables = Syllables(rng)
+    results = {
+        'Syllables()': best(lambda: Syllables(rng), 20),
+        'get_syllable': best(syllables.get_syllable, 2000),
+        'pick_letter': best(lambda: pick_letter(syllables.vowels, rng),
+                            2000),
+    }
+    results['use_inventory'] = best(syllables.use_inventory, 2)
+    results['get_syllable inventory'] = best(syllables.get_syllable, 2000)
+    return results
+
+
+def bench_language():
+    ''' creating a language, and drawing its phonology and grammar '''
+    seeds = iter(range(10 ** 9))
+    return {
+        'Language()': best(lambda: Language(seed=next(seeds)), 100),
+        'Language().build()':
+            best(lambda: Language(seed=next(seeds)).build(), 20),
+    }
+
+
+def bench_get_word(sizes):
+    ''' generating new words, and looking up existing ones '''
+    results = {}
+    for size in sizes:
+        entries = [('NN', 'word%d' % i) for i in range(size)]
+        repeat = 20 if size <= QUICK_SIZE else 1
+        times = []
+        for _ in range(repeat):
+            language = Language(seed=SEED).build()
+            start = time.perf_counter()
+            for (pos, translation) in entries:
+                language.get_word(pos, translation)
+            times.append((time.perf_counter() - start) / size)
+        results['get_word new x%d' % size] = min(times)
+
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for (pos, translation) in entries:
+                language.get_word(pos, translation)
+            times.append((time.perf_counter() - start) / size)
+        results['get_word cached x%d' % size] = min(times)
+        del language
+    return results
+
+
+def bench_inflect():
+    ''' inflecting a word for each tag set, with the rule chain on Word and
+    with the compiled rules '''
+    language = Language(seed=SEED)
+    results = {}
+    for (pos, tags) in TAG_SETS:
+        word = language.get_word(pos, 'inflected %s' % pos)
+        name = '+'.join([pos] + tags)
+        results['Word.inflect %s' % name] = \
+            best(lambda: word.inflect(language.rules, tags), 200)
+        results['Language.inflect %s' % name] = \
+            best(lambda: language.inflect(word, tags), 2000)
+    return results
+
+
+def bench_paradigms():
+    ''' every form of a hundred verbs, worked out and then remembered '''
+    language = Language(seed=SEED)
+    words = [language.get_word('VB', 'verb%d' % i) for i in range(100)]
+
+    def fresh():
+        for word in words:
+            word.forms = None
+        return language.paradigms(words, 'latin')
+    return {
+        'paradigms x100': best(fresh, 2),
+        'paradigms cached x100': best(
+            lambda: language.paradigms(words, 'latin'), 20),
+    }
+
+
+def bench_phrase():
+    ''' building a phrase out of words '''
+    language = Language(seed=SEED)
+    words = [language.get_word('NN', 'los'), language.get_word('NN', 'gatos')]
+    return {'get_phrase': best(
+        lambda: language.get_phrase('NNP', words, 'los gatos'), 500)}
+
+
+def bench_render():
+    ''' writing words out '''
+    language = Language(seed=SEED)
+    word = language.get_word('NN', 'rendered')
+    results = {
+        'get_latin': best(lambda: get_latin(word), 5000),
+        'get_ipa': best(lambda: get_ipa(word), 5000),
+    }
+
+    # without the memoized form, which is what a new word costs
+    def fresh(script):
+        word.rendered_lemma = None
+        return word.render(script)
+    results['get_latin uncached'] = best(lambda: fresh('latin'), 5000)
+    results['get_ipa uncached'] = best(lambda: fresh('ipa'), 5000)
+    return results
+
+
+def bench_export(size):
+    ''' writing a lexicon of size words to each export format, in seconds
+    per word, with and without paradigms for a tenth of the words '''
+    language = Language(seed=SEED).build()
+    language.get_words([(['NN', 'VB', 'JJ'][i % 3], 'word%d' % i) \
+                        for i in range(size)])
+    words = language.dictionary.values()
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for extension in ['jsonl', 'csv', 'db']:
+            path = os.path.join(directory, 'words.%s' % extension)
+            start = time.perf_counter()
+            export.write(path, words)
+            results['export %s x%d' % (extension, size)] = \
+                (time.perf_counter() - start) / size
+
+            path = os.path.join(directory, 'forms.%s' % extension)
+            sample = list(words)[:size // 10]
+            start = time.perf_counter()
+            export.write(path, sample, language)
+            results['export %s paradigms x%d' % (extension, len(sample))] = \
+                (time.perf_counter() - start) / len(sample)
+    return results
+
+
+def measure_memory(size):
+    ''' the peak memory per word, in bytes, while a dictionary of size words
+    is generated '''
+    language = Language(seed=SEED).build()
+    tracemalloc.start()
+    for i in range(size):
+        language.get_word('NN', 'word%d' % i)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'peak bytes per word x%d' % size: peak / size}
+
+
+def run(sizes=None, memory_size=100000, export_size=1000000,
+        rounds=ROUNDS):
+    ''' run every benchmark, returning the results as a dict. The quick
+    ones are run rounds times, keeping the best time for each '''
+    sizes = SIZES if sizes is None else sizes
+    quick = [bench_syllables, bench_language, bench_inflect,
+             bench_paradigms, bench_phrase, bench_render,
+             lambda: bench_get_word([s for s in sizes if s <= QUICK_SIZE])]
+    timings = {}
+    for _ in range(rounds):
+        for bench in quick:
+            for (name, value) in bench().items():
+                timings[name] = min(value, timings.get(name, value))
+    timings.update(bench_get_word([s for s in sizes if s > QUICK_SIZE]))
+    if export_size:
+        timings.update(bench_export(export_size))
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': SEED,
+        'timings': timings,
+        'memory': measure_memory(memory_size) if memory_size else {},
+    }
+
+
+def compare(results, baseline, tolerance=0.25):
+    ''' (name, baseline, result, ratio) for every timing and memory figure
+    in both, the names of the ones that got worse than the tolerance, the
+    names only the baseline has, and the names only the results have '''
+    rows = []
+    regressions = []
+    missing = []
+    extra = []
+    for section in ['timings', 'memory']:
+        old_figures = baseline.get(section, {})
+        new_figures = results.get(section, {})
+        for (name, old) in sorted(old_figures.items()):
+            new = new_figures.get(name)
+            if new is None:
+                missing.append(name)
+                continue
+            if not old:
+                continue
+            ratio = new / old
+            rows.append((name, old, new, ratio))
+            if ratio > 1 + tolerance:
+                regressions.append(name)
+        extra += sorted(set(new_figures) - set(old_figures))
+    return rows, regressions, missing, extra
+
+
+def get_figure(results, name):
+    ''' a timing or memory figure from results, by name '''
+    return results['timings'].get(name, results['memory'].get(name))
+
+
+def format_value(name, value):
+    ''' a timing in microseconds, or a memory figure in bytes '''
+    if 'bytes' in name:
+        return '%.0fB' % value
+    return '%.3fus' % (value * 1e6)
+
+
+def main():
+    ''' the command line '''
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES,
+                        help='dictionary sizes to time get_word at')
+    parser.add_argument('--memory-size', type=int, default=100000,
+                        help='dictionary size to measure memory at, 0 to skip')
+    parser.add_argument('--export-size', type=int, default=1000000,
+                        help='lexicon size to time exports at, 0 to skip')
+    parser.add_argument('--rounds', type=int, default=ROUNDS,
+                        help='how many times to run the quick benchmarks')
+    parser.add_argument('--output', help='write the results to this file')
+    parser.add_argument('--compare', help='a results file to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='how much slower than the baseline is allowed')
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.memory_size, args.export_size,
+                  args.rounds)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+
+    if not args.compare:
+        for section in ['timings', 'memory']:
+            for (name, value) in sorted(results[section].items()):
+                print('%-36s %12s' % (name, format_value(name, value)))
+        return 0
+
+    with open(args.compare) as source:
+        baseline = json.load(source)
+    rows, regressions, missing, extra = compare(results, baseline,
+                                                args.tolerance)
+    for (name, old, new, ratio) in rows:
+        print('%-36s %12s %12s %6.2fx%s' %
+              (name, format_value(name, old), format_value(name, new), ratio,
+               '  SLOWER' if name in regressions else ''))
+    for name in missing:
+        print('%-36s %12s %12s  MISSING' %
+              (name, format_value(name, get_figure(baseline, name)), '-'))
+    for name in extra:
+        print('%-36s %12s %12s  NOT IN BASELINE' %
+              (name, '-', format_value(name, get_figure(results, name))))
+    if regressions:
+        print('\n%d regressions over %d%%' %
+              (len(regressions), args.tolerance * 100))
+    if missing:
+        # a benchmark that was renamed or dropped can't hide a regression
+        print('\n%d baseline figures were not measured' % len(missing))
+    if extra:
+        print('\n%d figures are not in the baseline; record them with '
+              '--output' % len(extra))
+    return 1 if regressions or missing else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,20 +1,137 @@
 ''' Create a language '''
-from foreigntongue.syllable import Syllables
-from foreigntongue.pos import pos_list
-from foreigntongue.inflection import StemChange, Affix, Prefix
+from foreigntongue.syllable import Syllables, space
+from foreigntongue.pos import pos_list, inflection_lookup, punctuation, \
+    opening_punctuation
+from foreigntongue.inflection import StemChange, Affix, Prefix, Inflector
 from foreigntongue.word import Word
+from foreigntongue.lexicon import Lexicon, LRULexicon, FormIndex
+from collections import OrderedDict
 import random
-import re
 
 class Language(object):
     ''' initialize a language '''
-    space = [[{'IPA': ' ', 'latin': ' ', 'freq': 0}]]
-
-    def __init__(self):
-        self.dictionary = {}
+    space = ((space,),)
+
+    # a read-only lexicon file to look words up in before generating them
+    store = None
+
+    # a database of words shared with other processes (see open_shared)
+    shared = None
+
+    # the compiled rules, built on first use
+    inflector = None
+
+    # the forms of all words, when homophones aren't allowed
+    forms = None
+
+    # new words within this many phoneme edits of another word are redrawn
+    reject_similar = 0
+
+    # words are a pure function of the seed and their key
+    stateless = False
+
+    # the most words the dictionary holds, when it is bounded
+    max_words = None
+
+    # the words that make up each phrase, so evicted phrases can be rebuilt.
+    # With max_words, only that many of the most recent phrases are kept
+    phrases = None
+
+    # the definitions of words evicted from a bounded dictionary, which they
+    # get back when they are generated again
+    definitions = None
+
+    # counters and timers, when the language is instrumented
+    instruments = None
+
+    # syllables are drawn from a precomputed SyllableInventory
+    syllable_inventory = False
+
+    # the phonology and grammar, which are drawn on first use (see build)
+    lazy = frozenset(['syllables', 'syllable_stats', 'rules'])
+    built = False
+
+    def __init__(self, seed=None, rng=None, unique_forms=False,
+                 reject_similar=0, stateless=False, max_words=None,
+                 syllable_inventory=False):
+        ''' a seed, or a random.Random to draw from, makes the language
+        reproducible. Without either, the random module is used.
+        unique_forms=True keeps any two words from sounding the same. It can
+        also be a set-like object to track forms in, like a BloomFilter.
+        reject_similar=k also keeps new words from being within k phoneme
+        edits of an existing word, which avoids minimal pairs.
+        stateless=True draws each word from randomness of its own, seeded by
+        the language seed and the word's (translation, pos), so a word is the
+        same no matter what was generated before it, in any process.
+        max_words=n keeps only the n most recently used words, and is always
+        stateless so that an evicted word comes back exactly the same, with
+        its definition. A phrase comes back too, if it is one of the n most
+        recently used; older ones have to be built again with get_phrase.
+        syllable_inventory=True draws each syllable in one step from a table
+        of every syllable the language can form (see SyllableInventory for
+        entropy and collision estimates), but a seed makes a different
+        language than it does without it '''
+        stateless = stateless or bool(max_words)
+        if stateless and (unique_forms or reject_similar):
+            raise ValueError('Stateless languages can\'t use unique_forms or '
+                             'reject_similar, because they make a word '
+                             'depend on the words before it')
+        if rng is None:
+            rng = random if seed is None else random.Random(seed)
+        self.seed = seed
+        self.random = rng
+
+        self.dictionary = Lexicon()
+        if stateless:
+            self.stateless = True
+            self.phrases = OrderedDict()
+        if max_words:
+            self.max_words = max_words
+            self.definitions = {}
+            self.dictionary = LRULexicon(max_words, on_evict=self.evicted)
+        if syllable_inventory:
+            self.syllable_inventory = True
+
+        if unique_forms:
+            self.forms = FormIndex(None if unique_forms is True \
+                                   else unique_forms)
+        if reject_similar:
+            self.reject_similar = reject_similar
+            self.similar_stats = {'collisions': 0, 'retries': 0}
+
+        # stateless words are seeded from the language seed, so there has
+        # to be one
+        if stateless and seed is None:
+            self.seed = self.random.getrandbits(64)
+
+
+    def __getattr__(self, name):
+        # the lazy attributes only exist once the language is built
+        if name in Language.lazy and not self.built:
+            self.build()
+            return getattr(self, name)
+        raise AttributeError(name)
+
+
+    def __setattr__(self, name, value):
+        # build first, so replacing one of them doesn't change what the
+        # rest of the language draws
+        if name in Language.lazy and not self.built:
+            self.build()
+        object.__setattr__(self, name, value)
+
+
+    def build(self):
+        ''' draw the phonology and grammar. This happens the first time
+        any of them are used rather than when the language is created, but
+        it draws the same things in the same order, so a seed always gives
+        the same language '''
+        self.built = True
 
         # this selects phonemes and syllable formation patterns
-        self.syllables = Syllables()
+        syllables = Syllables(self.random)
+        if self.syllable_inventory:
+            syllables.use_inventory()
 
         # -------- MORPHOLOGY
         ''' Not going to worry about analytic/synthetic/etc terminology, instead
@@ -40,9 +157,9 @@ class Language(object):
          - The idea is to produce base forms that will be modified with the
            correct endings based on part of speech
         '''
-        self.syllable_stats = {
-            'syllables_mode': random.randint(2, 3),
-            'syllables_stdv': random.random() / 3
+        syllable_stats = {
+            'syllables_mode': self.random.randint(2, 3),
+            'syllables_stdv': self.random.random() / 3
         }
 
 
@@ -55,30 +172,30 @@ class Language(object):
            (in)animate, or, for that matter, any number of other offbeat things
         '''
 
-        self.rules = []
+        rules = []
 
         def create_rule(tags, rule_type=None):
             ''' generate an inflection rule to apply to a given tag set. NOTES:
             - stem change vs affix should be part of the whole conversation
               about grammar and morphology, instead of a random boolean '''
 
-            if rule_type == 'affix' or random.random() > 0.5:
-                ending = self.syllables.get_syllable()
+            if rule_type == 'affix' or self.random.random() > 0.5:
+                ending = syllables.get_syllable()
                 # prefer to append endings rather than prepend
-                if random.choice([0, 1, 1]):
+                if self.random.choice([0, 1, 1]):
                     rule = Affix(tags, ending)
                 else:
                     rule = Prefix(tags, ending)
             else:
-                replacement = self.syllables.pick_vowel()
+                replacement = syllables.pick_vowel()
                 rule = StemChange(tags, -1, replacement)
 
-            self.rules.append(rule)
+            rules.append(rule)
 
         for tag in pos_list:
             # apply endings to ~half of POSs, excluding proper nouns,
             # because they make names too confusing
-            if random.randint(0, 1) and tag != 'NNP':
+            if self.random.randint(0, 1) and tag != 'NNP':
                 create_rule([tag])
 
         # Plurals
@@ -86,9 +203,9 @@ class Language(object):
         number can matter with verbs, et cetera, so this is very
         anglocentric, and isn't considering how morphology works.'''
         plurals = ['singular', 'plural']
-        if random.random() > 0.8:
+        if self.random.random() > 0.8:
             plurals.append('plural2')
-            if random.random() > 0.6:
+            if self.random.random() > 0.6:
                 plurals.append('plural3')
         for plural in plurals:
             create_rule(['NN', plural])
@@ -111,9 +228,9 @@ class Language(object):
          '''
 
         tenses = ['present']
-        if random.randint(0, 20):
+        if self.random.randint(0, 20):
             tenses.append('past')
-            if random.randint(0, 20):
+            if self.random.randint(0, 20):
                 tenses.append('future')
         else:
             tenses.append('future')
@@ -121,6 +238,36 @@ class Language(object):
         for tense in tenses:
             create_rule(['VB', tense])
 
+        self.syllables = syllables
+        self.syllable_stats = syllable_stats
+        self.rules = rules
+        return self
+
+
+    def compile_rules(self):
+        ''' the compiled form of the current rules, which is rebuilt if
+        the rule list has changed '''
+        if self.inflector is None or self.inflector.rules != self.rules:
+            self.inflector = Inflector(self.rules, self.syllables.phonemes)
+        return self.inflector
+
+
+    def inflect(self, word, additional_tags=None):
+        ''' the syllable ids of a word inflected for its base tags and any
+        additional tags, using the compiled rules '''
+        tags = word.base_tags
+        if additional_tags:
+            tags = tags + list(additional_tags)
+        return self.compile_rules().inflect(word.stem_ids, tags)
+
+
+    def paradigms(self, words, script=None):
+        ''' the paradigm of each word (see Word.paradigm): its forms for
+        every tag set the rules inflect for, like plurals and tenses, as
+        syllable ids or as text in script '''
+        inflector = self.compile_rules()
+        return [word.paradigm(inflector, script) for word in words]
+
 
     # -------- GENERATORS
     def get_word(self, pos, translation, definition=None):
@@ -128,40 +275,216 @@ class Language(object):
         NOTES:
         - some PoSs should probably prefer shorter words.
         - doesn't consider portmanteau, blendwords, compounding, &c
-        - assumes that the string concatenation of translation and pos is unique
         '''
 
         # check if the word already exists
-        if translation+pos in self.dictionary:
-            return self.dictionary[translation+pos]
-
-        pos = pos if pos else random.choice(pos_list)
+        key = (translation, pos)
+        word = self.dictionary.get(key)
+        if word is not None:
+            return word
+        if self.store is not None:
+            word = self.store.get(translation, pos, self.syllables.phonemes)
+            if word is not None:
+                self.keep_word(key, word)
+                return word
+        if self.shared is not None:
+            word = self.shared.get(translation, pos, self.syllables.phonemes)
+            if word is not None:
+                self.keep_word(key, word)
+                return word
+
+        if self.definitions:
+            remembered = self.definitions.pop(key, None)
+            definition = remembered if definition is None else definition
+
+        rng = self.random
+        if self.stateless:
+            if key in self.phrases:
+                phrase = self.get_phrase(pos, [self.get_word(*w) \
+                                               for w in self.phrases[key]],
+                                         translation)
+                if definition is not None:
+                    phrase.set_definition(definition)
+                return phrase
+            rng = self.get_key_random(key)
+
+        pos = pos if pos else rng.choice(pos_list)
         tags = [pos]
 
-        # doesn't consider appropriateness of word length for the POS
-        syllables = int(random.normalvariate(
-            self.syllable_stats['syllables_mode'],
-            self.syllable_stats['syllables_stdv']))
-        syllables = 1 if syllables < 1 else syllables
-
-        data = [self.syllables.get_syllable() for _ in range(0, syllables)]
-
         # create provisional word before rules are applied
         word_data = Word(
             pos,
-            data,
+            None,
             translation,
             base_tags=tags,
-            definition=definition
+            definition=definition,
+            phonemes=self.syllables.phonemes,
+            word_id=self.get_id(key)
         )
+        word_data.stem_ids = self.get_stem(rng=rng)
 
         # inflect word based on its part of speech
-        word_data.set_lemma(self.rules)
-
-        self.dictionary[translation+pos] = word_data
+        word_data.lemma_ids = self.inflect(word_data)
+        if self.forms is not None or self.reject_similar:
+            self.make_unique(word_data)
+        if self.shared is not None:
+            # another process may have added the word first
+            word_data = self.shared.add(word_data)
+            if self.forms is not None:
+                self.forms.add(word_data.lemma_ids)
+
+        self.dictionary[(translation, pos)] = word_data
         return word_data
 
 
+    def evicted(self, key, word):
+        ''' remember what can't be generated again about a word evicted from
+        a bounded dictionary, which is its definition '''
+        if word.definition is not None:
+            self.definitions[key] = word.definition
+
+
+    def keep_word(self, key, word):
+        ''' add a word from the store or the shared lexicon to the
+        dictionary, claiming its form when homophones aren't allowed '''
+        if self.forms is not None:
+            self.forms.add(word.lemma_ids)
+        self.dictionary[key] = word
+
+
+    def get_words(self, entries):
+        ''' get_word for an iterable of (pos, translation, definition)
+        entries, where definition is optional. New words are generated
+        together: syllable counts and syllables are drawn in one batch, and
+        the rules are matched once per tag set rather than once per word.
+        Stateless words each have their own randomness, so they are
+        generated one at a time '''
+        if self.stateless:
+            return [self.get_word(e[0], e[1], e[2] if len(e) > 2 else None) \
+                    for e in entries]
+
+        words = []
+        pending = {}
+        for entry in entries:
+            pos, translation = entry[0], entry[1]
+            definition = entry[2] if len(entry) > 2 else None
+
+            key = (translation, pos)
+            if key not in self.dictionary and key not in pending and \
+                    self.store is not None:
+                word = self.store.get(translation, pos,
+                                      self.syllables.phonemes)
+                if word is not None:
+                    self.keep_word(key, word)
+            if key not in self.dictionary and key not in pending and \
+                    self.shared is not None:
+                word = self.shared.get(translation, pos,
+                                       self.syllables.phonemes)
+                if word is not None:
+                    self.keep_word(key, word)
+            if key in self.dictionary:
+                words.append(self.dictionary[key])
+                continue
+            if key not in pending:
+                pos = pos if pos else self.random.choice(pos_list)
+                pending[key] = Word(
+                    pos,
+                    None,
+                    translation,
+                    base_tags=[pos],
+                    definition=definition,
+                    phonemes=self.syllables.phonemes,
+                    word_id=self.get_id((translation, pos))
+                )
+            words.append(pending[key])
+
+        mode = self.syllable_stats['syllables_mode']
+        stdv = self.syllable_stats['syllables_stdv']
+        counts = [int(self.random.normalvariate(mode, stdv)) for _ in pending]
+        counts = [1 if c < 1 else c for c in counts]
+        batch = self.syllables.get_syllables(sum(counts))
+
+        start = 0
+        by_tags = {}
+        syllable_ids = batch.encode(self.syllables.phonemes)
+        for word, count in zip(pending.values(), counts):
+            word.stem_ids = tuple(syllable_ids[start:start + count])
+            start += count
+            by_tags.setdefault(tuple(word.base_tags), []).append(word)
+
+        # inflect each group of words with the transform for its tags
+        inflector = self.compile_rules()
+        for tags, group in by_tags.items():
+            transform = inflector.get_transform(tags)
+            for word in group:
+                word.lemma_ids = transform.apply(word.stem_ids)
+
+        for word in pending.values():
+            if self.forms is not None or self.reject_similar:
+                self.make_unique(word)
+            self.dictionary[(word.translation, word.pos)] = word
+        if self.shared is not None:
+            # other processes may have added some of the words first
+            added = dict(zip(map(id, pending.values()),
+                             self.shared.add_many(pending.values())))
+            for word in added.values():
+                self.keep_word((word.translation, word.pos), word)
+            words = [added.get(id(word), word) for word in words]
+        return words
+
+
+    def similar(self, word, distance=1):
+        ''' the other words within distance phoneme edits of a word, closest
+        first '''
+        return [w for (_, w) in self.dictionary.similar(word.lemma_ids,
+                                                        distance) \
+                if w is not word]
+
+
+    def get_stem(self, extra_syllables=0, rng=None):
+        ''' draw the syllables for a new word, as phoneme ids, from rng or
+        the language's own randomness '''
+        rng = rng or self.random
+        # doesn't consider appropriateness of word length for the POS
+        syllables = int(rng.normalvariate(
+            self.syllable_stats['syllables_mode'],
+            self.syllable_stats['syllables_stdv']))
+        syllables = 1 if syllables < 1 else syllables
+
+        encode = self.syllables.encode
+        return tuple(encode(self.syllables.get_syllable(rng)) \
+                     for _ in range(0, syllables + extra_syllables))
+
+
+    def make_unique(self, word):
+        ''' redraw the stem of a new word until its form isn't used by any
+        other word and, with reject_similar, isn't too close to one either.
+        Then claim the form. If a syllable count keeps coming up with
+        collisions, the word gets longer '''
+        retries = 0
+        collided = []
+        while True:
+            if self.forms is not None and word.lemma_ids in self.forms:
+                stats = self.forms.stats
+            elif self.reject_similar and self.dictionary.similar(
+                    word.lemma_ids, self.reject_similar):
+                stats = self.similar_stats
+            else:
+                break
+
+            retries += 1
+            stats['retries'] += 1
+            if not any(s is stats for s in collided):
+                stats['collisions'] += 1
+                collided.append(stats)
+
+            word.stem_ids = self.get_stem(retries // FormIndex.max_retries)
+            word.lemma_ids = self.inflect(word)
+
+        if self.forms is not None:
+            self.forms.add(word.lemma_ids)
+
+
     def get_phrase(self, pos, words, translation):
         ''' A constituent phrase with a distinct meaning or translation,
         such as a place name like "Los Gatos" '''
@@ -175,14 +498,109 @@ class Language(object):
         phrase = Word(
             pos,
             syllables,
-            translation
+            translation,
+            phonemes=self.syllables.phonemes,
+            word_id=self.get_id((translation, pos))
         )
-        phrase.set_lemma(self.rules)
-
-        self.dictionary[translation+pos] = phrase
+        phrase.lemma_ids = self.inflect(phrase)
+        if self.stateless:
+            self.phrases[(translation, pos)] = [(w.pos, w.translation) \
+                                                for w in words]
+            if self.max_words:
+                self.phrases.move_to_end((translation, pos))
+                while len(self.phrases) > self.max_words:
+                    self.phrases.popitem(last=False)
+
+        self.dictionary[(translation, pos)] = phrase
         return phrase
 
 
+    def get_id(self, key=None):
+        ''' a unique identifier for a new word. In a stateless language, or
+        one with a shared lexicon, the id is a hash of the word's
+        (translation, pos) key instead, so every process gives a word the
+        same id '''
+        if key is not None and (self.stateless or self.shared is not None):
+            from hashlib import blake2b
+            data = ('%s\x00%s' % key).encode('utf-8')
+            return int.from_bytes(blake2b(data, digest_size=7).digest(),
+                                  'little')
+        return self.dictionary.ids.allocate()
+
+
+    def get_key_random(self, key):
+        ''' the randomness for the word with a (translation, pos) key, which
+        is the same every time for the same language seed '''
+        return random.Random('%r\x00%s\x00%s' % ((self.seed,) + key))
+
+
+    def translate_stream(self, tagged_tokens, script='latin', chunk_size=64,
+                         cache_size=4096):
+        ''' translate a stream of (token, pos) or (token, pos, tags) tuples,
+        yielding the text a chunk of tokens at a time. Tokens are read
+        lazily, so a text of any length can go through in constant memory.
+        Penn tags for inflected forms, like NNS or VBD, are inflected with
+        the matching tags (see pos.inflection_lookup), so tokens should be
+        the lemmas from the tagger, like "cat" rather than "cats".
+        Punctuation is passed through, with opening punctuation like "("
+        written against the token after it, and the rest against the token
+        before it. '''
+        rendered = OrderedDict()
+        parts = []
+        started = False
+        # the last token was opening punctuation
+        attached = False
+        for tagged in tagged_tokens:
+            token, pos = tagged[0], tagged[1]
+            tags = list(tagged[2]) if len(tagged) > 2 else []
+
+            if pos in punctuation or not any(c.isalnum() for c in token):
+                if pos in opening_punctuation or token in opening_punctuation:
+                    parts.append(' ' + token if started and not attached \
+                                 else token)
+                    attached = True
+                else:
+                    parts.append(token)
+                    attached = False
+            else:
+                key = (token, pos, tuple(tags))
+                text = rendered.get(key)
+                if text is None:
+                    text = self.translate_token(token, pos, tags, script)
+                    rendered[key] = text
+                    if len(rendered) > cache_size:
+                        rendered.popitem(last=False)
+                else:
+                    rendered.move_to_end(key)
+                parts.append(' ' + text if started and not attached else text)
+                attached = False
+            started = True
+
+            if len(parts) >= chunk_size:
+                yield ''.join(parts)
+                parts = []
+        if parts:
+            yield ''.join(parts)
+
+
+    def translate_token(self, token, pos, tags, script='latin'):
+        ''' the written form of one token, inflected for its tags '''
+        if pos in inflection_lookup:
+            pos, extra_tags = inflection_lookup[pos]
+            tags = extra_tags + tags
+
+        word = self.get_word(pos, token.lower())
+        if tags:
+            text = self.syllables.phonemes.render(self.inflect(word, tags),
+                                                  script)
+        else:
+            text = word.render(script)
+
+        if token[:1].isupper():
+            text = text[:1].upper() + text[1:]
+        return text
+
+
     def about(self):
         ''' print out some info about this language '''
         vowels = self.syllables.vowels
@@ -195,38 +613,208 @@ class Language(object):
                self.syllable_stats['syllables_mode']))
 
         print('\nVOWELS:')
-        print(' '.join(re.sub('/', '', v['IPA']) for v in vowels))
-        print(' '.join(re.sub('/', '', v['latin']) for v in vowels))
+        print(' '.join(v.ipa for v in vowels))
+        print(' '.join(v.latin for v in vowels))
 
         print('CONSONANTS:')
-        print(' '.join(re.sub('/', '', v['IPA']) for v in consonants))
-        print(' '.join(re.sub('/', '', v['latin']) for v in consonants))
+        print(' '.join(v.ipa for v in consonants))
+        print(' '.join(v.latin for v in consonants))
 
         print('\nGRAMMAR:')
         for rule in self.rules:
             print(rule.tags, rule)
 
 
+    def open_store(self, path):
+        ''' look words up in a lexicon file written by write_store before
+        generating them '''
+        from foreigntongue import store
+        lexicon = store.MappedLexicon(path)
+        # the rules borrow any phonemes they need before the check
+        self.compile_rules()
+        lexicon.check(self.syllables.phonemes)
+        self.dictionary.ids.reserve(lexicon.max_id)
+        self.store = lexicon
+        return lexicon
+
+
+    def open_shared(self, path):
+        ''' keep words in a SQLite database, which other processes with a
+        language of the same seed can share. Words are looked up there
+        before they're generated, and the first process to generate a word
+        decides what it is for all of them '''
+        if self.seed is None:
+            raise ValueError('Only languages with a seed can share a lexicon')
+        from foreigntongue import shared
+        lexicon = shared.SharedLexicon(path, self.seed)
+        self.compile_rules()
+        lexicon.check(self.syllables.phonemes)
+        self.shared = lexicon
+        return lexicon
+
+
+    def write_store(self, path):
+        ''' write the dictionary to a memory-mapped lexicon file, which any
+        number of processes can share through open_store '''
+        from foreigntongue import store
+        self.compile_rules()
+        store.write(path, self.dictionary.values(), self.syllables.phonemes)
+
+
+    def save(self, path):
+        ''' write the whole language, including its dictionary, to a file '''
+        from foreigntongue import snapshot
+        with open(path, 'wb') as output:
+            output.write(snapshot.dumps(self))
+
+
+    @classmethod
+    def load(cls, path):
+        ''' read a language written by save '''
+        from foreigntongue import snapshot
+        with open(path, 'rb') as source:
+            return snapshot.loads(source.read(), cls)
+
+
+    def get_spec(self):
+        ''' the phonology, grammar, and settings of the language, but not its
+        words, as data that can be stored as JSON. from_spec turns it back
+        into a language. Forms kept in a set-like object, like a
+        BloomFilter, come back in an exact set '''
+        from foreigntongue import snapshot
+        phonemes = self.syllables.phonemes
+        # first, since rules can borrow phonemes
+        rules = [snapshot.dump_rule(rule, phonemes) for rule in self.rules]
+        spec = self.syllables.get_spec()
+        spec.update({
+            'seed': self.seed if isinstance(self.seed, (int, str)) else None,
+            'random': snapshot.get_random_state(self.random),
+            'syllable_stats': self.syllable_stats,
+            'rules': rules,
+            'stateless': self.stateless,
+            'max_words': self.max_words,
+            'syllable_inventory': self.syllable_inventory,
+            'unique_forms': self.forms is not None,
+            'form_stats': self.forms.get_stats() if self.forms is not None \
+                          else None,
+            'reject_similar': self.reject_similar,
+            'similar_stats': self.similar_stats if self.reject_similar \
+                             else None,
+            'phrases': [list(k) + [v] for (k, v) in \
+                        (self.phrases or {}).items()],
+            'evicted_definitions': [list(k) + [v] for (k, v) in \
+                                    (self.definitions or {}).items()],
+        })
+        return spec
+
+
+    @classmethod
+    def from_spec(cls, spec):
+        ''' a language from get_spec, with an empty dictionary. Nothing is
+        drawn, so this is much cheaper than building the language again '''
+        from foreigntongue import snapshot
+        rng = random
+        if spec['random'] is not None:
+            rng = random.Random()
+            rng.setstate(snapshot.load_random_state(spec['random']))
+
+        language = cls(seed=spec['seed'], rng=rng)
+        language.built = True
+        language.syllables = Syllables.from_spec(spec, rng)
+        if spec.get('syllable_inventory'):
+            language.syllable_inventory = True
+            language.syllables.use_inventory()
+        language.syllable_stats = spec['syllable_stats']
+        phonemes = language.syllables.phonemes
+        language.rules = [snapshot.load_rule(rule, phonemes) \
+                          for rule in spec['rules']]
+
+        if spec.get('stateless'):
+            language.stateless = True
+            language.phrases = OrderedDict(
+                ((t, p), [tuple(w) for w in words]) \
+                for (t, p, words) in spec['phrases'])
+        if spec.get('unique_forms'):
+            # the forms themselves are claimed again by the loaded words
+            language.forms = FormIndex()
+            language.forms.stats = dict(spec['form_stats'])
+        if spec.get('reject_similar'):
+            language.reject_similar = spec['reject_similar']
+            language.similar_stats = dict(spec['similar_stats'])
+        if spec.get('max_words'):
+            language.max_words = spec['max_words']
+            language.definitions = {
+                (t, p): d for (t, p, d) in spec.get('evicted_definitions', [])}
+            language.dictionary = LRULexicon(language.max_words,
+                                             on_evict=language.evicted)
+        return language
+
+
+    def instrument(self, enabled=True):
+        ''' start counting and timing what this language does, or stop with
+        enabled=False. See get_metrics '''
+        if enabled and self.instruments is None:
+            from foreigntongue.instruments import Instruments
+            self.instruments = Instruments(self)
+        elif not enabled and self.instruments is not None:
+            self.instruments.remove()
+            self.instruments = None
+
+
+    def get_metrics(self):
+        ''' the counters and timers of an instrumented language, or an empty
+        dict if it isn't instrumented '''
+        if self.instruments is None:
+            return {}
+        return self.instruments.get_metrics()
+
+
+    def reset_metrics(self):
+        ''' zero the counters and timers, like at the start of a request '''
+        if self.instruments is not None:
+            self.instruments.reset()
+
+
     def get_stats(self):
         ''' json formatted info on the language '''
-        return {
+        stats = {
             'vowels': self.syllables.vowels,
             'consonants': self.syllables.consonants,
             'mode_syllables': self.syllable_stats['syllables_mode']
         }
+        if self.forms is not None:
+            stats['forms'] = self.forms.get_stats()
+        if self.reject_similar:
+            stats['similar'] = self.similar_stats
+        if self.max_words:
+            stats['dictionary'] = self.dictionary.get_stats()
+        if self.syllable_inventory:
+            inventory = self.syllables.get_inventory()
+            stats['syllables'] = {'count': len(inventory),
+                                  'entropy': inventory.get_entropy()}
+        return stats
 
 # ------ PRINTERS
 def get_latin(word):
     ''' pick out the latin transcription '''
-    text = ''
-    for syllable in word.lemma:
-        text = text + ''.join(l['latin'] for l in syllable)
-    return re.sub('/', '', text)
+    return word.render('latin')
 
 def get_ipa(word):
     ''' pick out the latin transcription '''
-    text = ''
-    for syllable in word.lemma:
-        text = text + ''.join(l['IPA'] for l in syllable)
-    return re.sub('/', '', text)
-
+    return word.render('ipa')
+
+def render_many(words, script='latin'):
+    ''' the latin or IPA transcription of many words, like the values of
+    Language.dictionary. Words from the same language are written out with
+    a single join over all of their phoneme ids '''
+    words = list(words.values() if hasattr(words, 'values') else words)
+    if not words:
+        return []
+
+    phonemes = words[0].phonemes
+    if phonemes is None or any(w.phonemes is not phonemes for w in words):
+        return [word.render(script) for word in words]
+
+    blob = bytes([phonemes.separator]).join(
+        b''.join(word.lemma_ids) for word in words)
+    return phonemes.render((blob,), script).split('\n')
@@ -0,0 +1,179 @@
+''' Stream words out to JSON lines, CSV, or SQLite.
+
+    with open('words.jsonl', 'w') as output:
+        export.write_jsonl(output, language.dictionary.values(), language)
+    export.write_sqlite('words.db', language.dictionary.values())
+
+Words can come from any iterable, like Language.dictionary.values() or a
+generator, and are read and written a chunk at a time, so memory use
+depends on the chunk size rather than the size of the lexicon. Each chunk
+is rendered with a single join (see render_many), and SQLite rows are
+inserted with executemany, one transaction per chunk.
+
+With a language, the rows also have each word's paradigm (see
+Language.paradigms): its forms for every tag set the rules inflect for,
+other than the lemma. Forms are worked out for the export without being
+remembered on the words, so exporting a lexicon doesn't make it bigger.
+
+In SQLite, words are keyed on the seed of their language and their id,
+and forms on the seed, the word id, and the tags, so a database can hold
+the words of many languages, and exporting words to it again replaces
+their rows. The seed is stored as its repr, like in shared.SharedLexicon,
+so languages without a seed share the key 'None'.
+'''
+from foreigntongue import render_many
+from itertools import islice
+import csv
+import json
+import sqlite3
+
+# the columns of every row
+FIELDS = ['id', 'translation', 'pos', 'display_pos', 'definition', 'latin',
+          'ipa']
+
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS words (seed TEXT, id INTEGER, '
+    'translation TEXT, pos TEXT, display_pos TEXT, definition TEXT, '
+    'latin TEXT, ipa TEXT, PRIMARY KEY (seed, id))',
+    'CREATE TABLE IF NOT EXISTS forms (seed TEXT, word_id INTEGER, '
+    'tags TEXT, latin TEXT, ipa TEXT, PRIMARY KEY (seed, word_id, tags))',
+]
+
+
+def get_chunks(words, chunk_size=1000):
+    ''' lists of up to chunk_size words '''
+    words = iter(words)
+    while True:
+        chunk = list(islice(words, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def get_rows(words, language=None, chunk_size=1000):
+    ''' yield a list of (row, paradigm) for each chunk of words, where row
+    is a tuple of the FIELDS and paradigm is a list of (tags, latin, ipa)
+    for each inflected form, or None without a language '''
+    inflector = language.compile_rules() if language is not None else None
+    for chunk in get_chunks(words, chunk_size):
+        latin = render_many(chunk, 'latin')
+        ipa = render_many(chunk, 'ipa')
+        rows = [(word.id, word.translation, word.pos, word.display_pos,
+                 word.definition, word_latin, word_ipa) \
+                for (word, word_latin, word_ipa) in zip(chunk, latin, ipa)]
+        if inflector is None:
+            yield [(row, None) for row in rows]
+            continue
+
+        # every inflected form in the chunk is rendered at once
+        tag_sets = []
+        forms = []
+        for word in chunk:
+            # every tag set but the first, which is the lemma's
+            word_tag_sets = inflector.get_tag_sets(word.base_tags)[1:]
+            tag_sets.append([list(tags) for tags in word_tag_sets])
+            forms += [inflector.inflect(word.stem_ids,
+                                        word.base_tags + list(tags)) \
+                      for tags in word_tag_sets]
+        forms_latin = iter(render_forms(forms, language, 'latin'))
+        forms_ipa = iter(render_forms(forms, language, 'ipa'))
+        yield [(row, [(tags, next(forms_latin), next(forms_ipa)) \
+                      for tags in word_tag_sets]) \
+               for (row, word_tag_sets) in zip(rows, tag_sets)]
+
+
+def render_forms(forms, language, script='latin'):
+    ''' the text of many forms of words in a language, given as tuples of
+    syllable ids, with a single join '''
+    if not forms:
+        return []
+    phonemes = language.syllables.phonemes
+    blob = bytes([phonemes.separator]).join(b''.join(f) for f in forms)
+    return phonemes.render((blob,), script).split('\n')
+
+
+def write_jsonl(output, words, language=None, chunk_size=1000):
+    ''' write words to a text file, one JSON object per line, and return
+    how many were written '''
+    count = 0
+    for rows in get_rows(words, language, chunk_size):
+        lines = []
+        for (row, paradigm) in rows:
+            data = dict(zip(FIELDS, row))
+            if paradigm is not None:
+                data['paradigm'] = [
+                    {'tags': tags, 'latin': latin, 'ipa': ipa} \
+                    for (tags, latin, ipa) in paradigm]
+            lines.append(json.dumps(data, ensure_ascii=False))
+        lines.append('')
+        output.write('\n'.join(lines))
+        count += len(rows)
+    return count
+
+
+def write_csv(output, words, language=None, chunk_size=1000):
+    ''' write words to a text file, opened with newline='', as CSV with a
+    header row, and return how many were written. The paradigm is a JSON
+    list in the last column '''
+    writer = csv.writer(output)
+    writer.writerow(FIELDS + (['paradigm'] if language is not None else []))
+    count = 0
+    for rows in get_rows(words, language, chunk_size):
+        if language is None:
+            writer.writerows(row for (row, _) in rows)
+        else:
+            writer.writerows(row + (json.dumps(paradigm, ensure_ascii=False),)
+                             for (row, paradigm) in rows)
+        count += len(rows)
+    return count
+
+
+def write_sqlite(database, words, language=None, chunk_size=10000,
+                 seed=None):
+    ''' write words to the words table of a SQLite database, a path or an
+    open connection, and their inflected forms to the forms table,
+    replacing the rows of words that are already there. Rows are keyed on
+    the seed of the language, or on seed without one. Each chunk is
+    inserted in a transaction of its own. Returns how many words were
+    written '''
+    key = repr(language.seed if language is not None else seed)
+    connection = database
+    if not isinstance(database, sqlite3.Connection):
+        connection = sqlite3.connect(database)
+    try:
+        with connection:
+            for statement in SCHEMA:
+                connection.execute(statement)
+
+        count = 0
+        for rows in get_rows(words, language, chunk_size):
+            with connection:
+                connection.executemany(
+                    'INSERT OR REPLACE INTO words VALUES '
+                    '(?, ?, ?, ?, ?, ?, ?, ?)',
+                    [(key,) + row for (row, _) in rows])
+                if language is not None:
+                    connection.executemany(
+                        'INSERT OR REPLACE INTO forms VALUES (?, ?, ?, ?, ?)',
+                        [(key, row[0], ' '.join(tags), latin, ipa) \
+                         for (row, paradigm) in rows \
+                         for (tags, latin, ipa) in paradigm])
+            count += len(rows)
+        return count
+    finally:
+        if connection is not database:
+            connection.close()
+
+
+def write(path, words, language=None):
+    ''' write words to a file, in the format its extension is for: .jsonl,
+    .csv, or .db/.sqlite '''
+    if path.endswith('.jsonl'):
+        with open(path, 'w', encoding='utf-8') as output:
+            return write_jsonl(output, words, language)
+    if path.endswith('.csv'):
+        with open(path, 'w', encoding='utf-8', newline='') as output:
+            return write_csv(output, words, language)
+    if path.endswith('.db') or path.endswith('.sqlite'):
+        return write_sqlite(path, words, language)
+    raise ValueError('Unknown export format for %s' % path)
@@ -0,0 +1,83 @@
+''' Generate many seeded languages in parallel.
+
+Languages are built in worker processes, a chunk of seeds at a time, and
+come back as compact snapshots (see foreigntongue.snapshot) rather than
+pickled objects. Since a language only depends on its seed, the output is
+the same no matter how many workers there are.
+'''
+from foreigntongue import Language
+from foreigntongue import snapshot
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+# the vocabulary every language in a worker is seeded with, which is sent
+# to each worker once instead of with every chunk
+vocabulary = None
+
+
+def set_vocabulary(entries):
+    ''' runs when a worker process starts '''
+    global vocabulary
+    vocabulary = entries
+
+
+def build(seed, entries=None):
+    ''' create a language, add the vocabulary, and snapshot it '''
+    language = Language(seed=seed)
+    if entries:
+        language.get_words(entries)
+    return snapshot.dumps(language)
+
+
+def build_chunk(seeds):
+    ''' build a list of languages in a worker '''
+    return [build(seed, vocabulary) for seed in seeds]
+
+
+def generate(seeds, entries=None, workers=None, chunksize=8,
+             max_pending=None):
+    ''' yield (seed, snapshot) for each seed, in order, as the languages
+    are built. entries is the vocabulary for get_words, shared by every
+    language. At most max_pending chunks are queued at once, which is twice
+    the number of workers by default. With workers=0 everything is built in
+    this process. '''
+    seeds = iter(seeds)
+    entries = list(entries) if entries else None
+
+    if workers == 0:
+        for seed in seeds:
+            yield seed, build(seed, entries)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 2
+
+    def next_chunk():
+        chunk = []
+        for seed in seeds:
+            chunk.append(seed)
+            if len(chunk) >= chunksize:
+                break
+        return chunk
+
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=set_vocabulary,
+                             initargs=(entries,)) as executor:
+        pending = deque()
+        chunk = next_chunk()
+        while chunk or pending:
+            # keep the pool busy without queueing every seed at once
+            while chunk and len(pending) < max_pending:
+                pending.append((chunk, executor.submit(build_chunk, chunk)))
+                chunk = next_chunk()
+
+            done, future = pending.popleft()
+            for seed, data in zip(done, future.result()):
+                yield seed, data
+
+
+def generate_languages(seeds, entries=None, **kwargs):
+    ''' like generate, but yields (seed, Language) '''
+    for seed, data in generate(seeds, entries, **kwargs):
+        yield seed, snapshot.loads(data)
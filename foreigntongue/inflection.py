@@ -49,30 +49,217 @@ class StemChange(Rule):
         self.replacement = replacement
 
     def rule(self, syllables):
-        ''' change a vowel in a syllable '''
-        for (letter_index, letter) in enumerate(syllables[self.syllable_index]):
-            if is_vowel(letter):
-                syllables[self.syllable_index][letter_index] = self.replacement
-        return syllables
+        ''' change a vowel in a syllable. This returns a new tuple of
+        syllables, which shares every syllable but the changed one '''
+        syllables = tuple(syllables)
+        changed = tuple(self.replacement if is_vowel(letter) else letter \
+                        for letter in syllables[self.syllable_index])
+        index = self.syllable_index % len(syllables)
+        return syllables[:index] + (changed,) + syllables[index + 1:]
 
 
 class Affix(Rule):
     ''' modify a word by appending a syllable '''
     def __init__(self, tags, affix_syllable):
         Rule.__init__(self, tags)
-        self.affix = affix_syllable
+        self.affix = tuple(affix_syllable)
 
     def rule(self, syllables):
-        ''' change a vowel in a syllable '''
-        return syllables + [self.affix]
+        ''' add the affix to a new tuple of syllables '''
+        return tuple(syllables) + (self.affix,)
 
 
 class Prefix(Rule):
     ''' prepend a syllable '''
     def __init__(self, tags, prefix_syllable):
         Rule.__init__(self, tags)
-        self.prefix = prefix_syllable
+        self.prefix = tuple(prefix_syllable)
 
     def rule(self, syllables):
-        ''' change a vowel in a syllable '''
-        return [self.prefix] + syllables
+        ''' add the prefix to a new tuple of syllables '''
+        return (self.prefix,) + tuple(syllables)
+
+
+class Inflector(object):
+    ''' A set of rules compiled for fast inflection. Tags are encoded as bits
+    and rules are indexed by the mask of tags they require, so matching a
+    tag set is a few integer operations. Each tag set gets a Transform that
+    applies all of its matching rules at once, which is built the first time
+    that tag set is seen. '''
+
+    def __init__(self, rules, phonemes):
+        self.rules = list(rules)
+        self.phonemes = phonemes
+
+        # letters from elsewhere are borrowed into the phoneme table in the
+        # order of the rules, so they get the same ids in every process
+        for rule in self.rules:
+            if type(rule) is Prefix:
+                phonemes.encode(rule.prefix)
+            elif type(rule) is Affix:
+                phonemes.encode(rule.affix)
+            elif type(rule) is StemChange:
+                phonemes.encode([rule.replacement])
+
+        self.tag_bits = {}
+        self.rules_by_mask = {}
+        for (order, rule) in enumerate(self.rules):
+            mask = self.get_mask(rule.tags, add=True)
+            self.rules_by_mask.setdefault(mask, []).append((order, rule))
+
+        # the translation table for each vowel replacement
+        self.vowels = bytes(p.id for p in phonemes if is_vowel(p))
+        self.stem_tables = {}
+
+        self.transforms = {}
+        self.tag_sets = {}
+
+
+    def get_mask(self, tags, add=False):
+        ''' the bitmask for a set of tags. Tags that no rule uses are left
+        out, since they can't affect which rules match '''
+        mask = 0
+        for tag in tags:
+            if tag not in self.tag_bits:
+                if not add:
+                    continue
+                self.tag_bits[tag] = 1 << len(self.tag_bits)
+            mask |= self.tag_bits[tag]
+        return mask
+
+
+    def get_rules(self, tags):
+        ''' the rules that apply to a tag set, in their original order '''
+        if not tags:
+            # matches Rule.is_tag_match, where an empty tag set matches all
+            return self.rules
+
+        mask = self.get_mask(tags)
+        matches = []
+        for (required, rules) in self.rules_by_mask.items():
+            if required & mask == required:
+                matches += rules
+        return [rule for (_, rule) in sorted(matches, key=lambda m: m[0])]
+
+
+    def get_tag_sets(self, base_tags):
+        ''' the tag sets that can be added to a word's base tags to give
+        each of its forms: none, for the lemma, and every tag that completes
+        a rule the word already partly matches, like 'plural' for a noun
+        or 'past' for a verb, in the order of the rules '''
+        key = tuple(base_tags)
+        tag_sets = self.tag_sets.get(key)
+        if tag_sets is None:
+            tag_sets = [()]
+            for rule in self.rules:
+                missing = tuple(t for t in rule.tags if t not in base_tags)
+                if len(missing) == 1 and len(rule.tags) > 1 and \
+                        missing not in tag_sets:
+                    tag_sets.append(missing)
+            self.tag_sets[key] = tag_sets
+        return tag_sets
+
+
+    def get_transform(self, tags):
+        ''' the compiled transform for a tag set '''
+        key = tuple(tags)
+        transform = self.transforms.get(key)
+        if transform is None:
+            transform = self.compile(self.get_rules(tags))
+            self.transforms[key] = transform
+        return transform
+
+
+    def inflect(self, syllable_ids, tags):
+        ''' inflect a word stored as a tuple of phoneme id strings '''
+        return self.get_transform(tags).apply(syllable_ids)
+
+
+    def compile(self, rules):
+        ''' work out what a list of rules does to any stem: the syllables
+        added in front of it, the syllables added after it, and the vowel
+        replacements made within it '''
+        prefix = []
+        affix = []
+        stem_changes = []
+        for rule in rules:
+            if type(rule) is Prefix:
+                prefix.insert(0, self.phonemes.encode(rule.prefix))
+            elif type(rule) is Affix:
+                affix.append(self.phonemes.encode(rule.affix))
+            elif type(rule) is StemChange:
+                index = rule.syllable_index
+                table = self.get_stem_table(
+                    self.phonemes.encode([rule.replacement])[0])
+                if 0 <= index < len(prefix):
+                    prefix[index] = self.phonemes.intern(
+                        prefix[index].translate(table))
+                elif -len(affix) <= index < 0:
+                    affix[index] = self.phonemes.intern(
+                        affix[index].translate(table))
+                else:
+                    index = index - len(prefix) if index >= 0 \
+                            else index + len(affix)
+                    stem_changes.append((index, table))
+            else:
+                # not something we know how to compile
+                return ChainTransform(rules, self.phonemes)
+
+        return Transform(tuple(prefix), stem_changes, tuple(affix),
+                         ChainTransform(rules, self.phonemes),
+                         self.phonemes)
+
+
+    def get_stem_table(self, replacement):
+        ''' a bytes.translate table that swaps every vowel for the
+        replacement '''
+        if replacement not in self.stem_tables:
+            table = bytearray(range(256))
+            for vowel in self.vowels:
+                table[vowel] = replacement
+            self.stem_tables[replacement] = bytes(table)
+        return self.stem_tables[replacement]
+
+
+class Transform(object):
+    ''' the compiled effect of a list of rules on a word '''
+    __slots__ = ('prefix', 'stem_changes', 'affix', 'chain', 'phonemes')
+
+    def __init__(self, prefix, stem_changes, affix, chain, phonemes):
+        self.prefix = prefix
+        self.stem_changes = stem_changes
+        self.affix = affix
+        # used when a stem is too short for a stem change to land inside it
+        self.chain = chain
+        self.phonemes = phonemes
+
+
+    def apply(self, syllable_ids):
+        ''' inflect a tuple of phoneme id strings '''
+        if self.stem_changes:
+            syllables = list(syllable_ids)
+            for (index, table) in self.stem_changes:
+                if not -len(syllables) <= index < len(syllables):
+                    return self.chain.apply(syllable_ids)
+                syllables[index] = self.phonemes.intern(
+                    syllables[index].translate(table))
+            syllable_ids = tuple(syllables)
+        return self.prefix + syllable_ids + self.affix
+
+
+class ChainTransform(object):
+    ''' applies rules one after another, for rule lists that can't be
+    compiled '''
+    __slots__ = ('rules', 'phonemes')
+
+    def __init__(self, rules, phonemes):
+        self.rules = rules
+        self.phonemes = phonemes
+
+
+    def apply(self, syllable_ids):
+        ''' inflect a tuple of phoneme id strings '''
+        syllables = tuple(map(self.phonemes.decode, syllable_ids))
+        for rule in self.rules:
+            syllables = rule.rule(syllables)
+        return tuple(self.phonemes.encode(s) for s in syllables)
@@ -0,0 +1,187 @@
+''' Opt-in counters and timers for a language.
+
+Language.instrument() replaces a few methods on that language, its
+syllables, its phoneme table, and its compiled rules with versions that
+count and time what they do, and instrument(False) puts them back. Nothing
+is replaced until then, so a language that isn't instrumented doesn't pay
+anything for it.
+'''
+import time
+
+
+class Instruments(object):
+    ''' The counters and timers for one language:
+     - words generated and cache hits, from get_word and get_words
+     - syllables drawn
+     - how many times each rule was evaluated against a tag set, and how
+       many times it was applied to a word. Rules are compiled, so they are
+       only evaluated the first time a tag set is seen
+     - the calls to and cumulative time spent in get_syllable,
+       get_syllables, inflection, and rendering '''
+
+    def __init__(self, language):
+        self.language = language
+        # (object, method name) for everything that has been replaced
+        self.installed = []
+        # the rules that match each tag set, by inflector
+        self.matches = {}
+        self.reset()
+        self.install()
+
+
+    def reset(self):
+        ''' set everything back to zero '''
+        self.counters = {'words_generated': 0, 'cache_hits': 0,
+                         'syllables_drawn': 0}
+        self.timers = {}
+        self.rules = {}
+
+
+    def get_metrics(self):
+        ''' the counters, timers, and rule counts as a dict '''
+        rules = []
+        for (index, rule) in enumerate(self.language.rules):
+            counts = self.rules.get(rule, {'evaluated': 0, 'applied': 0})
+            rules.append(dict(counts, index=index, tags=list(rule.tags),
+                              type=type(rule).__name__))
+        return {
+            'counters': dict(self.counters),
+            'timers': {name: {'calls': calls, 'seconds': seconds} \
+                       for (name, (calls, seconds)) in self.timers.items()},
+            'rules': rules,
+        }
+
+
+    def add_time(self, name, start):
+        ''' add a call that started at start to a timer '''
+        calls, seconds = self.timers.get(name, (0, 0.0))
+        self.timers[name] = (calls + 1,
+                             seconds + time.perf_counter() - start)
+
+
+    def count_rule(self, rule, counter):
+        ''' count an evaluation or application of a rule '''
+        counts = self.rules.get(rule)
+        if counts is None:
+            counts = self.rules[rule] = {'evaluated': 0, 'applied': 0}
+        counts[counter] += 1
+
+
+    def replace(self, target, name, wrapper):
+        ''' replace a method on one object with a wrapper '''
+        setattr(target, name, wrapper)
+        self.installed.append((target, name))
+
+
+    def install(self):
+        ''' replace the methods that are measured '''
+        language = self.language
+        syllables = language.syllables
+
+        get_syllable = syllables.get_syllable
+        def timed_get_syllable(rng=None):
+            start = time.perf_counter()
+            syllable = get_syllable(rng)
+            self.add_time('get_syllable', start)
+            self.counters['syllables_drawn'] += 1
+            return syllable
+        self.replace(syllables, 'get_syllable', timed_get_syllable)
+
+        get_syllables = syllables.get_syllables
+        def timed_get_syllables(count):
+            start = time.perf_counter()
+            batch = get_syllables(count)
+            self.add_time('get_syllables', start)
+            self.counters['syllables_drawn'] += count
+            return batch
+        self.replace(syllables, 'get_syllables', timed_get_syllables)
+
+        render = syllables.phonemes.render
+        def timed_render(syllable_ids, script='latin'):
+            start = time.perf_counter()
+            text = render(syllable_ids, script)
+            self.add_time('render', start)
+            return text
+        self.replace(syllables.phonemes, 'render', timed_render)
+
+        get_word = language.get_word
+        def counted_get_word(pos, translation, definition=None):
+            key = (translation, pos)
+            if key in language.dictionary or \
+                    (language.store is not None and key in language.store):
+                self.counters['cache_hits'] += 1
+            else:
+                self.counters['words_generated'] += 1
+            return get_word(pos, translation, definition)
+        self.replace(language, 'get_word', counted_get_word)
+
+        get_words = language.get_words
+        def counted_get_words(entries):
+            entries = list(entries)
+            # stateless languages count each word in get_word
+            if not language.stateless:
+                seen = set()
+                for entry in entries:
+                    key = (entry[1], entry[0])
+                    if key in seen or key in language.dictionary or \
+                            (language.store is not None and
+                             key in language.store):
+                        self.counters['cache_hits'] += 1
+                    else:
+                        self.counters['words_generated'] += 1
+                    seen.add(key)
+            return get_words(entries)
+        self.replace(language, 'get_words', counted_get_words)
+
+        compile_rules = language.compile_rules
+        def instrumented_compile_rules():
+            inflector = compile_rules()
+            if 'get_transform' not in inflector.__dict__:
+                self.instrument_inflector(inflector)
+            return inflector
+        self.replace(language, 'compile_rules', instrumented_compile_rules)
+
+
+    def instrument_inflector(self, inflector):
+        ''' count rule evaluations when a tag set is compiled, and hand out
+        transforms that count and time each time they're applied '''
+        get_transform = inflector.get_transform
+        matches = self.matches.setdefault(inflector, {})
+
+        def counted_get_transform(tags):
+            key = tuple(tags)
+            if key not in matches:
+                if key not in inflector.transforms:
+                    for rule in inflector.rules:
+                        self.count_rule(rule, 'evaluated')
+                matches[key] = inflector.get_rules(tags)
+            return CountedTransform(get_transform(tags), matches[key], self)
+        self.replace(inflector, 'get_transform', counted_get_transform)
+
+
+    def remove(self):
+        ''' put back everything that was replaced '''
+        for (target, name) in reversed(self.installed):
+            delattr(target, name)
+        self.installed = []
+        self.matches = {}
+
+
+class CountedTransform(object):
+    ''' a Transform that counts and times each time it's applied '''
+    __slots__ = ('transform', 'rules', 'instruments')
+
+    def __init__(self, transform, rules, instruments):
+        self.transform = transform
+        self.rules = rules
+        self.instruments = instruments
+
+
+    def apply(self, syllable_ids):
+        ''' inflect a tuple of phoneme id strings '''
+        start = time.perf_counter()
+        inflected = self.transform.apply(syllable_ids)
+        self.instruments.add_time('inflect', start)
+        for rule in self.rules:
+            self.instruments.count_rule(rule, 'applied')
+        return inflected
@@ -0,0 +1,283 @@
+''' The dictionary of a language, with indexes for looking words up '''
+from foreigntongue.similarity import NeighborIndex
+from collections import OrderedDict
+from collections.abc import MutableMapping
+import math
+
+
+class Lexicon(MutableMapping):
+    ''' Words keyed on (translation, pos). Besides the key, words can be
+    found by part of speech, by id, and by their written form in latin or
+    IPA, and words that sound similar can be found by phoneme edit
+    distance. The indexes are kept up to date as words are added and
+    removed; the form and similarity indexes are only built the first time
+    they are used. '''
+
+    def __init__(self, words=None):
+        self.words = {}
+        self.pos_index = {}
+        self.id_index = {}
+        self.form_index = None
+        self.indexed_forms = {}
+        self.neighbor_index = None
+        self.indexed_sequences = {}
+        self.ids = IdAllocator()
+        if words:
+            self.update(words)
+
+
+    def __getitem__(self, key):
+        return self.words[key]
+
+
+    def __setitem__(self, key, word):
+        if key in self.words:
+            del self[key]
+        self.words[key] = word
+        self.pos_index.setdefault(word.pos, {})[key] = word
+        self.id_index[word.id] = word
+        self.ids.reserve(word.id)
+        if self.form_index is not None:
+            self.add_forms(key, word)
+        if self.neighbor_index is not None:
+            self.add_neighbor(key, word)
+
+
+    def __delitem__(self, key):
+        word = self.words.pop(key)
+        del self.pos_index[word.pos][key]
+        if self.id_index.get(word.id) is word:
+            del self.id_index[word.id]
+        if self.form_index is not None:
+            self.remove_forms(key, word)
+        if self.neighbor_index is not None:
+            self.neighbor_index.remove(self.indexed_sequences.pop(key), word)
+
+
+    def __contains__(self, key):
+        return key in self.words
+
+
+    def __iter__(self):
+        return iter(self.words)
+
+
+    def __len__(self):
+        return len(self.words)
+
+
+    def get(self, key, default=None):
+        return self.words.get(key, default)
+
+
+    def keys(self):
+        return self.words.keys()
+
+
+    def values(self):
+        return self.words.values()
+
+
+    def items(self):
+        return self.words.items()
+
+
+    def by_pos(self, pos):
+        ''' every word with this part of speech '''
+        return list(self.pos_index.get(pos, {}).values())
+
+
+    def by_id(self, word_id):
+        ''' the word with this id, or None '''
+        return self.id_index.get(word_id)
+
+
+    def by_form(self, text, script='latin'):
+        ''' the words written as this text in 'latin' or 'ipa'. A
+        language can have homophones, so this is a list '''
+        if self.form_index is None:
+            self.form_index = {'latin': {}, 'ipa': {}}
+            for (key, word) in self.words.items():
+                self.add_forms(key, word)
+        return list(self.form_index[script].get(text, {}).values())
+
+
+    def similar(self, lemma_ids, distance=1):
+        ''' (distance, word) for every word whose lemma is within distance
+        phoneme edits of these lemma ids, closest first '''
+        if self.neighbor_index is None or \
+                self.neighbor_index.max_distance < distance:
+            self.neighbor_index = NeighborIndex(distance)
+            self.indexed_sequences = {}
+            for (key, word) in self.words.items():
+                self.add_neighbor(key, word)
+        return self.neighbor_index.search(b''.join(lemma_ids), distance)
+
+
+    def reindex(self, key):
+        ''' update the indexes after changing the lemma of a word '''
+        self[key] = self.words[key]
+
+
+    def add_forms(self, key, word):
+        ''' add a word to the written-form index '''
+        texts = {}
+        for (script, forms) in self.form_index.items():
+            texts[script] = word.render(script)
+            forms.setdefault(texts[script], {})[key] = word
+        self.indexed_forms[key] = texts
+
+
+    def add_neighbor(self, key, word):
+        ''' add a word to the similarity index '''
+        sequence = b''.join(word.lemma_ids)
+        self.neighbor_index.add(sequence, word)
+        self.indexed_sequences[key] = sequence
+
+
+    def remove_forms(self, key, word):
+        ''' remove a word from the written-form index, using the text it
+        was indexed under in case its lemma has since changed '''
+        for (script, text) in self.indexed_forms.pop(key).items():
+            words = self.form_index[script][text]
+            del words[key]
+            if not words:
+                del self.form_index[script][text]
+
+
+class LRULexicon(Lexicon):
+    ''' A Lexicon of at most capacity words, where adding a word past that
+    evicts the one that was least recently looked up. This only makes sense
+    if evicted words can be generated again exactly as they were, as they
+    are in a Language with max_words. Lookups through get are counted as
+    hits and misses. on_evict, if given, is called with the key and word of
+    every evicted word. '''
+
+    def __init__(self, capacity, words=None, on_evict=None):
+        Lexicon.__init__(self)
+        self.words = OrderedDict()
+        self.capacity = capacity
+        self.on_evict = on_evict
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        if words:
+            self.update(words)
+
+
+    def __getitem__(self, key):
+        word = self.words[key]
+        self.words.move_to_end(key)
+        return word
+
+
+    def __setitem__(self, key, word):
+        Lexicon.__setitem__(self, key, word)
+        while len(self.words) > self.capacity:
+            key = next(iter(self.words))
+            evicted = self.words[key]
+            del self[key]
+            self.stats['evictions'] += 1
+            if self.on_evict is not None:
+                self.on_evict(key, evicted)
+
+
+    def get(self, key, default=None):
+        word = self.words.get(key)
+        if word is None:
+            self.stats['misses'] += 1
+            return default
+        self.stats['hits'] += 1
+        self.words.move_to_end(key)
+        return word
+
+
+    def get_stats(self):
+        ''' the cache counters and the number of words held '''
+        stats = dict(self.stats)
+        stats['words'] = len(self.words)
+        stats['capacity'] = self.capacity
+        return stats
+
+
+class IdAllocator(object):
+    ''' hands out word ids in order, so they are small and never collide.
+    Ids that are already in use are reserved so they aren't handed out '''
+
+    def __init__(self, start=1):
+        self.next_id = start
+
+
+    def allocate(self):
+        ''' a new id '''
+        word_id = self.next_id
+        self.next_id += 1
+        return word_id
+
+
+    def reserve(self, word_id):
+        ''' make sure an existing id is never handed out '''
+        if word_id >= self.next_id:
+            self.next_id = word_id + 1
+
+
+class FormIndex(object):
+    ''' The forms of the words in a language, for finding homophones. The
+    form of a word is the sequence of phonemes in its lemma, regardless of
+    how they split into syllables. Forms are kept in an exact set by
+    default, or in anything with add and "in", such as a BloomFilter. '''
+
+    # collisions in a row before a new word is given an extra syllable
+    max_retries = 10
+
+    def __init__(self, forms=None):
+        self.forms = set() if forms is None else forms
+        # words that collided at least once, and the total number of redraws
+        self.stats = {'collisions': 0, 'retries': 0}
+
+
+    def __contains__(self, lemma_ids):
+        return b''.join(lemma_ids) in self.forms
+
+
+    def add(self, lemma_ids):
+        ''' claim the form of a lemma '''
+        self.forms.add(b''.join(lemma_ids))
+
+
+    def get_stats(self):
+        ''' the collision counters '''
+        return self.stats
+
+
+class BloomFilter(object):
+    ''' A fixed-size set of byte strings that can have false positives but
+    never false negatives. For unique forms, a false positive only costs an
+    unneeded redraw, and memory stays fixed however big the lexicon gets. '''
+
+    def __init__(self, capacity=1000000, error_rate=0.001):
+        # the standard sizing for the bit count and the number of hashes
+        bits = -capacity * math.log(error_rate) / math.log(2) ** 2
+        self.size = max(8, int(bits))
+        self.hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+
+    def get_positions(self, item):
+        ''' the bits for an item, by double hashing one digest '''
+        from hashlib import blake2b
+        digest = blake2b(item, digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+
+    def add(self, item):
+        ''' set the bits for an item '''
+        for position in self.get_positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+
+    def __contains__(self, item):
+        for position in self.get_positions(item):
+            if not self.bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
@@ -0,0 +1,108 @@
+''' A load generator for foreigntongue.server.
+
+Start a server and point this at it:
+
+    python -m foreigntongue.server --port 8080 &
+    python -m foreigntongue.loadgen --port 8080 --requests 10000
+
+Each client keeps a connection open and sends word requests one after
+another, for words in a random pick of seeded languages, and the latency
+of every request is reported as percentiles.
+'''
+from urllib.parse import urlencode
+import argparse
+import asyncio
+import random
+import time
+
+
+async def client(host, port, targets, latencies):
+    ''' send requests from a shared list of targets over one connection '''
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while targets:
+            target = targets.pop()
+            start = time.perf_counter()
+            writer.write(('GET %s HTTP/1.1\r\nHost: %s\r\n\r\n' %
+                          (target, host)).encode('latin-1'))
+            await writer.drain()
+
+            status = await reader.readline()
+            size = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.lower() == 'content-length':
+                    size = int(value)
+            await reader.readexactly(size)
+            latencies.append(time.perf_counter() - start)
+            if b' 200 ' not in status:
+                raise ValueError('Request failed: %s' % status.decode())
+    finally:
+        writer.close()
+
+
+def get_targets(count, seeds, vocabulary, rng):
+    ''' the paths for count word requests '''
+    return ['/word?%s' % urlencode({'seed': rng.randrange(seeds),
+                                    'pos': rng.choice(['NN', 'VB', 'JJ']),
+                                    'translation': 'word%d' % \
+                                    rng.randrange(vocabulary)}) \
+            for _ in range(count)]
+
+
+def percentile(values, fraction):
+    ''' the value at a fraction of the way through sorted values '''
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def run(host='127.0.0.1', port=8080, requests=10000, concurrency=50,
+              seeds=1000, vocabulary=5000, seed=0):
+    ''' send the requests and return the latency percentiles, in
+    milliseconds, and the throughput '''
+    targets = get_targets(requests, seeds, vocabulary, random.Random(seed))
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*[client(host, port, targets, latencies) \
+                           for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'seconds': elapsed,
+        'requests_per_second': len(latencies) / elapsed,
+        'p50': percentile(latencies, 0.5) * 1000,
+        'p99': percentile(latencies, 0.99) * 1000,
+        'max': latencies[-1] * 1000,
+    }
+
+
+def main():
+    ''' the command line '''
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--seeds', type=int, default=1000,
+                        help='how many languages to spread requests over')
+    parser.add_argument('--vocabulary', type=int, default=5000,
+                        help='how many words to spread requests over')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.host, args.port, args.requests,
+                             args.concurrency, args.seeds, args.vocabulary,
+                             args.seed))
+    print('%d requests in %.2fs (%.0f/s)' %
+          (result['requests'], result['seconds'],
+           result['requests_per_second']))
+    print('p50 %.2fms  p99 %.2fms  max %.2fms' %
+          (result['p50'], result['p99'], result['max']))
+
+
+if __name__ == '__main__':
+    main()
@@ -26,3 +26,31 @@ pos_lookup = {
 
 pos_list = list(pos_lookup.keys())
 
+
+# Penn treebank tags for inflected forms, as the base part of speech and the
+# grammatical tags the language inflects on
+inflection_lookup = {
+    'NNS': ('NN', ['plural']),
+    'NNPS': ('NNP', ['plural']),
+    'VBD': ('VB', ['past']),
+    'VBN': ('VB', ['past']),
+    'VBP': ('VB', ['present']),
+    'VBZ': ('VB', ['present']),
+    'VBG': ('VB', []),
+    'JJR': ('JJ', ['comparative']),
+    'JJS': ('JJ', ['superlative']),
+    'RBR': ('RB', ['comparative']),
+    'RBS': ('RB', ['superlative']),
+    'PRP$': ('PRP', ['possessive']),
+    'WP': ('WDT', []),
+    'WP$': ('WDT', ['possessive']),
+}
+
+# tags for tokens that are passed through untranslated
+punctuation = {'.', ',', ':', '``', "''", '(', ')', '-LRB-', '-RRB-', '#',
+               '$', 'SYM'}
+
+# punctuation tags and tokens that open something, and so are written
+# against the token after them rather than the one before
+opening_punctuation = {'``', '(', '-LRB-', '#', '$', '[', '{', '-LCB-',
+                       '\u201c', '\u2018'}
@@ -0,0 +1,381 @@
+''' An HTTP service for words in many seeded languages.
+
+Run it with ``python -m foreigntongue.server``. It only uses the standard
+library: requests are parsed on top of asyncio streams and every answer is
+JSON.
+
+    GET  /word?seed=1&pos=NN&translation=fish
+    GET  /phrase?seed=1&pos=NNP&translation=los gatos&words=DT:los,NN:gatos
+    POST /render    {"seed": 1, "entries": [["NN", "fish"]], "script": "latin"}
+    GET  /stats
+
+Live languages are kept in a bounded LRU keyed on seed, so a popular
+language is only built once. Building languages and rendering big batches
+of words happen in an executor, so the event loop never waits on them.
+With --shared, words are kept in a SQLite database (see
+foreigntongue.shared), so every server process that uses it gives the
+same word for the same request. Any word that isn't already in memory
+then has to be read from or written to the database, so those requests
+go to the executor too.
+'''
+from foreigntongue import Language, render_many
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlsplit, parse_qs
+import argparse
+import asyncio
+import json
+import weakref
+
+STATUS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+          405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class LanguageCache(object):
+    ''' Languages by seed, least recently used first. The oldest ones are
+    evicted when there are more than capacity of them, or when their
+    estimated memory goes over max_bytes. An evicted language is simply
+    built again from its seed the next time it's asked for. '''
+
+    # rough sizes in bytes of a language with no words, and of each word
+    base_size = 30000
+    word_size = 600
+
+    def __init__(self, capacity=1000, max_bytes=None):
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.languages = OrderedDict()
+        self.sizes = {}
+        self.size = 0
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+
+    def __contains__(self, seed):
+        return seed in self.languages
+
+
+    def __len__(self):
+        return len(self.languages)
+
+
+    def get(self, seed):
+        ''' the language for a seed, or None '''
+        language = self.languages.get(seed)
+        if language is None:
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        self.languages.move_to_end(seed)
+        return language
+
+
+    def add(self, seed, language):
+        ''' keep a language, evicting others if there isn't room '''
+        self.languages[seed] = language
+        self.languages.move_to_end(seed)
+        self.account(seed)
+
+
+    def account(self, seed):
+        ''' update the size of a language after it has gained words '''
+        if seed not in self.languages:
+            return
+        size = self.estimate(self.languages[seed])
+        self.size += size - self.sizes.get(seed, 0)
+        self.sizes[seed] = size
+        self.evict()
+
+
+    def estimate(self, language):
+        ''' the approximate memory used by a language '''
+        return self.base_size + len(language.dictionary) * self.word_size
+
+
+    def evict(self):
+        ''' drop the least recently used languages until there's room,
+        always keeping the newest one '''
+        while len(self.languages) > 1 and (
+                len(self.languages) > self.capacity or
+                (self.max_bytes and self.size > self.max_bytes)):
+            seed, _ = self.languages.popitem(last=False)
+            self.size -= self.sizes.pop(seed)
+            self.stats['evictions'] += 1
+
+
+    def get_stats(self):
+        ''' the counters, the number of languages, and their size '''
+        stats = dict(self.stats)
+        stats['languages'] = len(self.languages)
+        stats['bytes'] = self.size
+        return stats
+
+
+class WordService(object):
+    ''' the request handlers and the HTTP protocol around them. Requests
+    for a single word are answered directly on the event loop, while
+    anything over bulk_size words goes to the executor. A language is only
+    used by one request at a time. shared is the path of a database of
+    words to share with other processes, and when it's set, words that
+    aren't in memory yet are looked up in the executor as well '''
+
+    def __init__(self, capacity=1000, max_bytes=None, executor=None,
+                 bulk_size=50, shared=None):
+        self.languages = LanguageCache(capacity, max_bytes)
+        self.executor = executor or ThreadPoolExecutor()
+        self.bulk_size = bulk_size
+        self.shared = shared
+        # seeds -> futures for languages that are being built
+        self.building = {}
+        self.locks = weakref.WeakKeyDictionary()
+        self.routes = {
+            '/word': ('GET', self.word),
+            '/phrase': ('GET', self.phrase),
+            '/render': ('POST', self.render),
+            '/stats': ('GET', self.get_stats),
+        }
+
+
+    async def get_language(self, seed):
+        ''' the live language for a seed, which is built in the executor
+        if it isn't in the cache '''
+        language = self.languages.get(seed)
+        if language is not None:
+            return language
+
+        future = self.building.get(seed)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor,
+                                          partial(self.build, seed))
+            self.building[seed] = future
+            future.add_done_callback(partial(self.built, seed))
+        return await future
+
+
+    def build(self, seed):
+        ''' create the language for a seed, drawing its phonology and
+        grammar here, in the executor, rather than in the first request '''
+        language = Language(seed=seed).build()
+        if self.shared:
+            language.open_shared(self.shared)
+        return language
+
+
+    def built(self, seed, future):
+        ''' cache a language once it has been built '''
+        del self.building[seed]
+        if not future.cancelled() and future.exception() is None:
+            self.languages.add(seed, future.result())
+
+
+    def get_lock(self, language):
+        ''' the lock that keeps a language to one request at a time '''
+        lock = self.locks.get(language)
+        if lock is None:
+            lock = self.locks[language] = asyncio.Lock()
+        return lock
+
+
+    async def lookup(self, function, *args):
+        ''' call a function that may have to reach the shared database, in
+        the executor if there is one, rather than on the event loop '''
+        if not self.shared:
+            return function(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor,
+                                          partial(function, *args))
+
+
+    async def word(self, params, body):
+        ''' a single word '''
+        seed = get_seed(params)
+        pos = params.get('pos', 'NN')
+        translation = params['translation']
+        language = await self.get_language(seed)
+        async with self.get_lock(language):
+            word = language.dictionary.get((translation, pos))
+            if word is None:
+                word = await self.lookup(language.get_word, pos, translation)
+            self.languages.account(seed)
+        return describe(word)
+
+
+    async def phrase(self, params, body):
+        ''' a phrase made of words, like "DT:los,NN:gatos" '''
+        seed = get_seed(params)
+        pos = params.get('pos', 'NNP')
+        translation = params['translation']
+        entries = [e.split(':', 1) for e in params['words'].split(',')]
+        if any(len(e) != 2 for e in entries):
+            raise ValueError('Words must be given as pos:translation')
+
+        language = await self.get_language(seed)
+        async with self.get_lock(language):
+            phrase = language.dictionary.get((translation, pos))
+            if phrase is None:
+                phrase = await self.lookup(make_phrase, language, pos,
+                                           translation, entries)
+            self.languages.account(seed)
+        return describe(phrase)
+
+
+    async def render(self, params, body):
+        ''' many words at once, in latin or IPA '''
+        request = json.loads(body.decode('utf-8'))
+        seed = get_seed(request)
+        entries = [tuple(e) for e in request['entries']]
+        script = request.get('script', 'latin')
+        if script not in ('latin', 'ipa'):
+            raise ValueError('Unknown script %s' % script)
+
+        language = await self.get_language(seed)
+        async with self.get_lock(language):
+            if len(entries) > self.bulk_size:
+                loop = asyncio.get_running_loop()
+                forms = await loop.run_in_executor(
+                    self.executor, render_entries, language, entries, script)
+            else:
+                forms = render_entries(language, entries, script)
+            self.languages.account(seed)
+        return {'seed': seed, 'script': script, 'forms': forms}
+
+
+    async def get_stats(self, params, body):
+        ''' the state of the language cache '''
+        return self.languages.get_stats()
+
+
+    async def dispatch(self, method, target, body):
+        ''' the status and JSON response for a request '''
+        url = urlsplit(target)
+        if url.path not in self.routes:
+            return 404, {'error': 'Not found'}
+        allowed, handler = self.routes[url.path]
+        if method != allowed:
+            return 405, {'error': 'Use %s' % allowed}
+
+        params = {k: v[-1] for (k, v) in parse_qs(url.query).items()}
+        try:
+            return 200, await handler(params, body)
+        except KeyError as error:
+            return 400, {'error': 'Missing %s' % error.args[0]}
+        except ValueError as error:
+            return 400, {'error': str(error)}
+        except IndexError as error:
+            return 400, {'error': str(error)}
+
+
+    async def handle(self, reader, writer):
+        ''' answer requests on a connection until the client is done '''
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, target, version = line.decode('latin-1').split()
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                size = int(headers.get('content-length', 0))
+                body = await reader.readexactly(size) if size else b''
+
+                try:
+                    status, result = await self.dispatch(method, target, body)
+                except Exception as error:
+                    status, result = 500, {'error': str(error)}
+
+                keep_alive = version == 'HTTP/1.1' and \
+                    headers.get('connection', '').lower() != 'close'
+                data = json.dumps(result, ensure_ascii=False).encode('utf-8')
+                writer.write(('HTTP/1.1 %d %s\r\n' \
+                              'Content-Type: application/json\r\n' \
+                              'Content-Length: %d\r\n' \
+                              'Connection: %s\r\n\r\n' %
+                              (status, STATUS[status], len(data),
+                               'keep-alive' if keep_alive else 'close')
+                             ).encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+    async def start(self, host='127.0.0.1', port=8080):
+        ''' start listening, returning the asyncio server '''
+        return await asyncio.start_server(self.handle, host, port)
+
+
+def get_seed(params):
+    ''' the seed of a request, as a number if it is one '''
+    seed = params['seed']
+    try:
+        return int(seed)
+    except (TypeError, ValueError):
+        return seed
+
+
+def describe(word):
+    ''' the JSON for a word '''
+    return {
+        'id': word.id,
+        'translation': word.translation,
+        'pos': word.pos,
+        'definition': word.definition,
+        'latin': word.render('latin'),
+        'ipa': word.render('ipa'),
+    }
+
+
+def make_phrase(language, pos, translation, entries):
+    ''' a phrase of the words for (pos, translation) entries '''
+    words = [language.get_word(p, t) for (p, t) in entries]
+    return language.get_phrase(pos, words, translation)
+
+
+def render_entries(language, entries, script):
+    ''' the written forms of (pos, translation) entries '''
+    return render_many(language.get_words(entries), script)
+
+
+async def serve(host='127.0.0.1', port=8080, **kwargs):
+    ''' run the service until it is cancelled '''
+    server = await WordService(**kwargs).start(host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    ''' the command line '''
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--languages', type=int, default=1000,
+                        help='how many languages to keep live')
+    parser.add_argument('--max-bytes', type=int, default=None,
+                        help='the estimated memory to keep languages in')
+    parser.add_argument('--bulk-size', type=int, default=50,
+                        help='render requests this big go to the executor')
+    parser.add_argument('--shared', default=None,
+                        help='a SQLite database of words to share with '
+                        'other server processes')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, capacity=args.languages,
+                          max_bytes=args.max_bytes, bulk_size=args.bulk_size,
+                          shared=args.shared))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+''' A lexicon in a SQLite database that many processes share.
+
+Words are keyed on (language seed, translation, pos), and a word is only
+ever inserted if it isn't there yet, so the first process to generate a
+word decides what it is and every other process reads that word back.
+The database is in WAL mode, so readers don't wait for writers.
+
+Each process (and thread) keeps one connection per database, opened the
+first time it's needed, which is never carried across a fork. Lookups
+and inserts use the same few statements every time, which the sqlite3
+module keeps prepared. Languages keep the words they've read in their
+own dictionary, so only words a process hasn't seen yet reach SQLite.
+'''
+from foreigntongue.word import load_word
+import json
+import os
+import sqlite3
+import threading
+
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS languages (seed TEXT PRIMARY KEY, '
+    'inventory TEXT)',
+    'CREATE TABLE IF NOT EXISTS words (seed TEXT, translation TEXT, '
+    'pos TEXT, id INTEGER, definition TEXT, base_tags TEXT, stem BLOB, '
+    'lemma BLOB, PRIMARY KEY (seed, translation, pos)) WITHOUT ROWID',
+]
+
+SELECT = 'SELECT id, definition, base_tags, stem, lemma FROM words ' \
+         'WHERE seed = ? AND translation = ? AND pos = ?'
+INSERT = 'INSERT OR IGNORE INTO words VALUES (?, ?, ?, ?, ?, ?, ?, ?)'
+
+# the connections of this process, by thread
+pool = threading.local()
+
+
+def connect(path, timeout=30):
+    ''' this process and thread's connection to a database, which is
+    opened in WAL mode the first time '''
+    if getattr(pool, 'pid', None) != os.getpid():
+        pool.pid = os.getpid()
+        pool.connections = {}
+    connection = pool.connections.get(path)
+    if connection is None:
+        connection = sqlite3.connect(path, timeout=timeout,
+                                     isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        for statement in SCHEMA:
+            connection.execute(statement)
+        pool.connections[path] = connection
+    return connection
+
+
+class SharedLexicon(object):
+    ''' the words of the language with a seed, in a database shared with
+    other processes. Like store.MappedLexicon, words are looked up with
+    get, and new words are added with add, which returns the word that was
+    there first if another process beat it '''
+
+    def __init__(self, path, seed, timeout=30):
+        self.path = path
+        self.seed = repr(seed)
+        self.timeout = timeout
+
+
+    def get_connection(self):
+        ''' the pooled connection for this process and thread '''
+        return connect(self.path, self.timeout)
+
+
+    def close(self):
+        ''' close this thread's connection to the database, which is opened
+        again if the lexicon is used after this '''
+        connection = getattr(pool, 'connections', {}).pop(self.path, None)
+        if connection is not None and pool.pid == os.getpid():
+            connection.close()
+
+
+    def __len__(self):
+        return self.get_connection().execute(
+            'SELECT COUNT(*) FROM words WHERE seed = ?',
+            (self.seed,)).fetchone()[0]
+
+
+    def __contains__(self, key):
+        return self.get_connection().execute(
+            SELECT, (self.seed,) + tuple(key)).fetchone() is not None
+
+
+    def check(self, phonemes):
+        ''' raise an error if the database has words for this seed that
+        were made with other phonemes, like by another version of the
+        generator '''
+        inventory = json.dumps([p['IPA'] for p in phonemes])
+        connection = self.get_connection()
+        connection.execute('INSERT OR IGNORE INTO languages VALUES (?, ?)',
+                           (self.seed, inventory))
+        stored = connection.execute(
+            'SELECT inventory FROM languages WHERE seed = ?',
+            (self.seed,)).fetchone()[0]
+        if stored != inventory:
+            raise ValueError('Lexicon was written for a different language')
+
+
+    def get(self, translation, pos, phonemes):
+        ''' the Word for a key, or None. phonemes is the table of the
+        language the lexicon belongs to '''
+        row = self.get_connection().execute(
+            SELECT, (self.seed, translation, pos)).fetchone()
+        if row is None:
+            return None
+        word_id, definition, base_tags, stem, lemma = row
+        return load_word(pos, translation, word_id, definition,
+                         json.loads(base_tags), phonemes.unpack(stem),
+                         phonemes.unpack(lemma), phonemes)
+
+
+    def add(self, word):
+        ''' store a new word unless the key already has one, and return
+        whichever word the key has now '''
+        return self.add_many([word])[0]
+
+
+    def add_many(self, words):
+        ''' add for many words, in one transaction '''
+        connection = self.get_connection()
+        added = []
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            for word in words:
+                cursor = connection.execute(INSERT, self.get_row(word))
+                if not cursor.rowcount:
+                    word = self.get(word.translation, word.pos, word.phonemes)
+                added.append(word)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return added
+
+
+    def get_row(self, word):
+        ''' the database row for a word '''
+        return (self.seed, word.translation, word.pos, word.id,
+                word.definition, json.dumps(word.base_tags),
+                word.phonemes.pack(word.stem_ids),
+                word.phonemes.pack(word.lemma_ids))
@@ -0,0 +1,108 @@
+''' Finding words that are only a few phonemes apart '''
+
+def edit_distance(first, second, limit=None):
+    ''' the Levenshtein distance between two sequences of phoneme ids. With
+    a limit, anything further apart than that comes back as limit + 1 '''
+    if len(first) < len(second):
+        first, second = second, first
+    if limit is not None and len(first) - len(second) > limit:
+        return limit + 1
+
+    previous = list(range(len(second) + 1))
+    for (i, a) in enumerate(first):
+        current = [i + 1]
+        for (j, b) in enumerate(second):
+            current.append(min(previous[j + 1] + 1, current[j] + 1,
+                               previous[j] + (a != b)))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def distance_within_one(first, second):
+    ''' a faster edit_distance for when only 0, 1, or "more" matters, which
+    returns 2 for anything further apart than one edit '''
+    if first == second:
+        return 0
+    if len(first) < len(second):
+        first, second = second, first
+    if len(first) - len(second) > 1:
+        return 2
+
+    i = 0
+    while i < len(second) and first[i] == second[i]:
+        i += 1
+    if len(first) == len(second):
+        return 1 if first[i + 1:] == second[i + 1:] else 2
+    return 1 if first[i + 1:] == second[i:] else 2
+
+
+def get_deletions(sequence, distance):
+    ''' every sequence made by deleting up to distance phonemes '''
+    variants = {sequence}
+    for _ in range(min(distance, len(sequence))):
+        variants.update([v[:i] + v[i + 1:] for v in variants \
+                         for i in range(len(v))])
+    return variants
+
+
+class NeighborIndex(object):
+    ''' A deletion-neighborhood index over phoneme sequences. Two sequences
+    within edit distance k always have a deletion variant (of up to k
+    deletions) in common, so a query only looks at the few sequences that
+    share a variant with it instead of scanning the whole lexicon. '''
+
+    def __init__(self, max_distance=1):
+        self.max_distance = max_distance
+        # deletion variant -> sequences that produce it
+        self.variants = {}
+        # sequence -> the words with that sequence
+        self.sequences = {}
+
+
+    def add(self, sequence, word):
+        ''' index a word under its phoneme sequence '''
+        words = self.sequences.setdefault(sequence, [])
+        if not words:
+            for variant in get_deletions(sequence, self.max_distance):
+                self.variants.setdefault(variant, set()).add(sequence)
+        words.append(word)
+
+
+    def remove(self, sequence, word):
+        ''' take a word out of the index '''
+        words = self.sequences.get(sequence, [])
+        if word in words:
+            words.remove(word)
+        if words:
+            return
+        self.sequences.pop(sequence, None)
+        for variant in get_deletions(sequence, self.max_distance):
+            found = self.variants.get(variant)
+            if found is not None:
+                found.discard(sequence)
+                if not found:
+                    del self.variants[variant]
+
+
+    def search(self, sequence, distance=1):
+        ''' (distance, word) for every word within distance edits of a
+        phoneme sequence, closest first '''
+        if distance > self.max_distance:
+            raise ValueError('This index only supports distances up to %d' %
+                             self.max_distance)
+        candidates = set()
+        for variant in get_deletions(sequence, distance):
+            candidates.update(self.variants.get(variant, ()))
+
+        matches = []
+        for candidate in candidates:
+            if distance == 1:
+                found = distance_within_one(sequence, candidate)
+            else:
+                found = edit_distance(sequence, candidate, distance)
+            if found <= distance:
+                matches += [(found, w) for w in self.sequences[candidate]]
+        matches.sort(key=lambda match: match[0])
+        return matches
@@ -0,0 +1,321 @@
+''' A compact, versioned serialization of a language.
+
+The layout is a short binary header, a JSON document with the phonology,
+grammar, and word metadata, and then binary sections, listed in the JSON,
+with the distinct syllables as phoneme ids, arrays of syllable indexes
+for the stem and lemma of every word, and the state of the random number
+generator:
+
+    magic (4 bytes) | version (2) | JSON length (4) | JSON | sections
+'''
+from foreigntongue.inflection import StemChange, Affix, Prefix
+from foreigntongue.word import load_word
+from foreigntongue.lexicon import Lexicon
+from array import array
+from itertools import accumulate, islice
+import json
+import random
+import struct
+import sys
+
+MAGIC = b'FTNG'
+VERSION = 1
+
+HEADER = struct.Struct('>4sHI')
+
+
+def dumps(language):
+    ''' serialize a language and its dictionary to bytes '''
+    words = list(language.dictionary.values())
+
+    # every distinct syllable and tag set is stored once, and words refer
+    # to them by index
+    syllables = {}
+    tag_sets = {}
+    stems = array('I')
+    lemmas = array('I')
+    for word in words:
+        for syllable in word.stem_ids:
+            stems.append(syllables.setdefault(syllable, len(syllables)))
+        for syllable in word.lemma_ids:
+            lemmas.append(syllables.setdefault(syllable, len(syllables)))
+
+    sections = {
+        'syllables': language.syllables.phonemes.pack(syllables),
+        'stems': stems,
+        'lemmas': lemmas,
+        'stem_lengths': array('I', [len(w.stem_ids) for w in words]),
+        'lemma_lengths': array('I', [len(w.lemma_ids) for w in words]),
+        'tags': array('I', [tag_sets.setdefault(
+            (w.pos,) + tuple(w.base_tags), len(tag_sets)) for w in words]),
+        'ids': array('q', [w.id for w in words]),
+    }
+
+    spec = language.get_spec()
+    if spec['random'] is not None:
+        # the 624 words of the generator's state are packed into a section,
+        # and only its position and gauss value are left in the JSON
+        version, internal, gauss = spec['random']
+        sections['random'] = array('I', internal[:-1])
+        spec['random'] = [version, internal[-1], gauss]
+    spec.update({
+        'tag_sets': list(tag_sets),
+        'translations': [w.translation for w in words],
+        'definitions': {i: w.definition for (i, w) in enumerate(words) \
+                        if w.definition is not None},
+        'sections': [],
+    })
+
+    blobs = []
+    for (name, section) in sections.items():
+        if isinstance(section, array):
+            typecode = section.typecode
+            if sys.byteorder != 'little':
+                section.byteswap()
+            section = section.tobytes()
+        else:
+            typecode = None
+        spec['sections'].append([name, typecode, len(section)])
+        blobs.append(section)
+
+    header = json.dumps(spec, ensure_ascii=False,
+                        separators=(',', ':')).encode('utf-8')
+    return b''.join([HEADER.pack(MAGIC, VERSION, len(header)), header] + blobs)
+
+
+def loads(data, language_class=None):
+    ''' rebuild a language from bytes created by dumps '''
+    if language_class is None:
+        from foreigntongue import Language as language_class
+
+    magic, version, size = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError('Not a language snapshot')
+    if version != VERSION:
+        raise ValueError('Unsupported snapshot version %d' % version)
+    offset = HEADER.size
+    spec = json.loads(bytes(data[offset:offset + size]).decode('utf-8'))
+    offset += size
+
+    sections = {}
+    for (name, typecode, size) in spec['sections']:
+        section = bytes(data[offset:offset + size])
+        if typecode:
+            section = array(typecode, section)
+            if sys.byteorder != 'little':
+                section.byteswap()
+        sections[name] = section
+        offset += size
+
+    if 'random' in sections:
+        version, position, gauss = spec['random']
+        spec['random'] = [version, sections['random'].tolist() + [position],
+                          gauss]
+    language = language_class.from_spec(spec)
+    phonemes = language.syllables.phonemes
+    syllables = get_syllables(sections, phonemes)
+    if type(language.dictionary) is Lexicon:
+        language.dictionary = SnapshotLexicon(spec, sections, phonemes,
+                                              syllables)
+    else:
+        # a bounded dictionary, which has to evict words as it fills up
+        load_words(spec, sections, phonemes, language.dictionary, syllables)
+    if language.forms is not None:
+        # the words claim their forms again, without being built
+        for lemma in slice_words(syllables, sections['lemmas'],
+                                 sections['lemma_lengths']):
+            language.forms.add(lemma)
+    return language
+
+
+def get_syllables(sections, phonemes):
+    ''' the interned syllables of a snapshot, in the order of their
+    indexes '''
+    return list(phonemes.unpack(sections['syllables']))
+
+
+class SnapshotLexicon(Lexicon):
+    ''' The words of a snapshot, which, like store.MappedLexicon, are only
+    turned into Word objects when they're looked up. Until then the
+    dictionary holds each word's number in the snapshot's sections. Anything
+    that needs every word, like values() or the indexes, builds the rest of
+    them first. '''
+
+    def __init__(self, spec, sections, phonemes, syllables=None):
+        Lexicon.__init__(self)
+        self.phonemes = phonemes
+        self.syllables = syllables if syllables is not None else \
+            get_syllables(sections, phonemes)
+        self.stems = sections['stems']
+        self.lemmas = sections['lemmas']
+        self.stem_starts = list(accumulate(sections['stem_lengths'],
+                                           initial=0))
+        self.lemma_starts = list(accumulate(sections['lemma_lengths'],
+                                            initial=0))
+        self.tags = sections['tags']
+        self.word_ids = sections['ids']
+        self.tag_sets = [(t[0], list(t[1:])) for t in spec['tag_sets']]
+        self.definitions = {int(i): d for (i, d) in \
+                            spec['definitions'].items()}
+
+        poses = [pos for (pos, _) in self.tag_sets]
+        self.words = dict(zip(zip(spec['translations'],
+                                  map(poses.__getitem__, self.tags)),
+                              range(len(self.tags))))
+        self.pending = len(self.words)
+        if self.word_ids:
+            self.ids.reserve(max(self.word_ids))
+
+
+    def __getitem__(self, key):
+        word = self.words[key]
+        if word.__class__ is int:
+            word = self.build(key, word)
+        return word
+
+
+    def __delitem__(self, key):
+        if self.words[key].__class__ is int:
+            del self.words[key]
+            self.pending -= 1
+            return
+        Lexicon.__delitem__(self, key)
+
+
+    def get(self, key, default=None):
+        word = self.words.get(key)
+        if word is None:
+            return default
+        if word.__class__ is int:
+            word = self.build(key, word)
+        return word
+
+
+    def build(self, key, number):
+        ''' turn the record of a word into a Word, keeping its place '''
+        pos, base_tags = self.tag_sets[self.tags[number]]
+        syllables = self.syllables.__getitem__
+        stem = self.stems[self.stem_starts[number]:
+                          self.stem_starts[number + 1]]
+        lemma = self.lemmas[self.lemma_starts[number]:
+                            self.lemma_starts[number + 1]]
+        word = load_word(pos, key[0], self.word_ids[number],
+                         self.definitions.get(number), base_tags[:],
+                         tuple(map(syllables, stem)),
+                         tuple(map(syllables, lemma)), self.phonemes)
+
+        self.words[key] = word
+        self.pos_index.setdefault(pos, {})[key] = word
+        self.id_index[word.id] = word
+        self.pending -= 1
+        return word
+
+
+    def load(self):
+        ''' build every word that hasn't been built yet '''
+        if not self.pending:
+            return
+        for (key, word) in list(self.words.items()):
+            if word.__class__ is int:
+                self.build(key, word)
+        # in the order of the snapshot, like a dictionary filled in order
+        self.pos_index = {}
+        for (key, word) in self.words.items():
+            self.pos_index.setdefault(word.pos, {})[key] = word
+
+
+    def values(self):
+        self.load()
+        return Lexicon.values(self)
+
+
+    def items(self):
+        self.load()
+        return Lexicon.items(self)
+
+
+    def by_pos(self, pos):
+        self.load()
+        return Lexicon.by_pos(self, pos)
+
+
+    def by_id(self, word_id):
+        self.load()
+        return Lexicon.by_id(self, word_id)
+
+
+    def by_form(self, text, script='latin'):
+        self.load()
+        return Lexicon.by_form(self, text, script)
+
+
+    def similar(self, lemma_ids, distance=1):
+        self.load()
+        return Lexicon.similar(self, lemma_ids, distance)
+
+
+def load_words(spec, sections, phonemes, dictionary=None, syllables=None):
+    ''' fill a Lexicon with the words of a snapshot, all at once '''
+    if syllables is None:
+        syllables = get_syllables(sections, phonemes)
+    stems = slice_words(syllables, sections['stems'],
+                        sections['stem_lengths'])
+    lemmas = slice_words(syllables, sections['lemmas'],
+                         sections['lemma_lengths'])
+
+    tag_sets = [(t[0], list(t[1:])) for t in spec['tag_sets']]
+    definitions = {int(i): d for (i, d) in spec['definitions'].items()}
+
+    if dictionary is None:
+        dictionary = Lexicon()
+    columns = zip(spec['translations'], sections['tags'], sections['ids'],
+                  stems, lemmas)
+    for (i, (translation, tags, word_id, stem, lemma)) in enumerate(columns):
+        pos, base_tags = tag_sets[tags]
+        dictionary[(translation, pos)] = load_word(
+            pos, translation, word_id, definitions.get(i), base_tags[:],
+            stem, lemma, phonemes)
+    return dictionary
+
+
+def slice_words(syllables, indexes, lengths):
+    ''' yield the tuple of syllables for each word '''
+    words = map(syllables.__getitem__, indexes)
+    for length in lengths:
+        yield tuple(islice(words, length))
+
+
+def dump_rule(rule, phonemes):
+    ''' a rule as a list of its type, tags, and phoneme ids '''
+    if type(rule) is Affix:
+        return ['affix', rule.tags, list(phonemes.encode(rule.affix))]
+    if type(rule) is Prefix:
+        return ['prefix', rule.tags, list(phonemes.encode(rule.prefix))]
+    if type(rule) is StemChange:
+        return ['stem', rule.tags, rule.syllable_index,
+                phonemes.encode([rule.replacement])[0]]
+    raise ValueError('Cannot serialize rule of type %s' % type(rule).__name__)
+
+
+def load_rule(data, phonemes):
+    ''' the rule for a list created by dump_rule '''
+    if data[0] == 'affix':
+        return Affix(data[1], phonemes.decode(bytes(data[2])))
+    if data[0] == 'prefix':
+        return Prefix(data[1], phonemes.decode(bytes(data[2])))
+    if data[0] == 'stem':
+        return StemChange(data[1], data[2], phonemes[data[3]])
+    raise ValueError('Unknown rule type %s' % data[0])
+
+
+def get_random_state(rng):
+    ''' the state of a random.Random, or None for the random module '''
+    if not isinstance(rng, random.Random):
+        return None
+    version, internal, gauss = rng.getstate()
+    return [version, list(internal), gauss]
+
+
+def load_random_state(state):
+    ''' a random.Random state from get_random_state '''
+    return (state[0], tuple(state[1]), state[2])
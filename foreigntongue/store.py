@@ -0,0 +1,190 @@
+''' A read-only lexicon in a memory-mapped file.
+
+The file has a fixed layout: a header, a hash table keyed on (translation,
+pos), a table of fixed-size word records, the JSON metadata of each word,
+and a blob of phoneme ids. Words are only turned into Word objects when
+they are looked up, and since the file is mapped read-only, every process
+that opens it shares the same pages instead of keeping its own copy.
+'''
+from foreigntongue.word import load_word
+from hashlib import blake2b
+import json
+import mmap
+import struct
+
+MAGIC = b'FTLX'
+VERSION = 1
+
+# magic, version, slot count, record count, the offsets of the records,
+# metadata, and phoneme ids, the size of the phoneme inventory, and the
+# highest word id
+HEADER = struct.Struct('<4sHIIQQQIq')
+# key hash and record number plus one, where 0 is an empty slot
+SLOT = struct.Struct('<QI')
+# word id, the offset and size of its metadata, and the offset of its stem
+# and lemma and their sizes
+RECORD = struct.Struct('<qQIQHH')
+
+
+def get_hash(translation, pos):
+    ''' a hash of the key that is the same in every process '''
+    key = ('%s\x00%s' % (translation, pos)).encode('utf-8')
+    return int.from_bytes(blake2b(key, digest_size=8).digest(), 'little')
+
+
+def write(path, words, phonemes):
+    ''' write Words, such as the values of Language.dictionary, to a file.
+    phonemes is the table of the language they came from '''
+    words = list(words)
+    slot_count = 8
+    while slot_count < len(words) * 2:
+        slot_count *= 2
+
+    slots = bytearray(SLOT.size * slot_count)
+    records = bytearray()
+    metadata = bytearray()
+    blob = bytearray()
+
+    # the inventory is at the start of the metadata
+    inventory = json.dumps([p['IPA'] for p in phonemes]).encode('utf-8')
+    metadata += inventory
+
+    for (number, word) in enumerate(words):
+        key_hash = get_hash(word.translation, word.pos)
+        slot = key_hash & (slot_count - 1)
+        while SLOT.unpack_from(slots, slot * SLOT.size)[1]:
+            slot = (slot + 1) & (slot_count - 1)
+        SLOT.pack_into(slots, slot * SLOT.size, key_hash, number + 1)
+
+        data = json.dumps([word.translation, word.pos, word.definition,
+                           word.base_tags]).encode('utf-8')
+        stem = phonemes.pack(word.stem_ids)
+        lemma = phonemes.pack(word.lemma_ids)
+        records += RECORD.pack(word.id, len(metadata), len(data),
+                               len(blob), len(stem), len(lemma))
+        metadata += data
+        blob += stem + lemma
+
+    records_offset = HEADER.size + len(slots)
+    metadata_offset = records_offset + len(records)
+    blob_offset = metadata_offset + len(metadata)
+    with open(path, 'wb') as output:
+        output.write(HEADER.pack(MAGIC, VERSION, slot_count, len(words),
+                                 records_offset, metadata_offset,
+                                 blob_offset, len(inventory),
+                                 max([w.id for w in words] or [0])))
+        output.write(slots)
+        output.write(records)
+        output.write(metadata)
+        output.write(blob)
+
+
+class MappedLexicon(object):
+    ''' words looked up by (translation, pos) in a file created by write '''
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as source:
+            self.map = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, self.slot_count, self.record_count,
+         self.records_offset, self.metadata_offset,
+         self.blob_offset, size, self.max_id) = \
+            HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError('Not a lexicon file')
+        if version != VERSION:
+            raise ValueError('Unsupported lexicon version %d' % version)
+
+        self.inventory = json.loads(
+            self.map[self.metadata_offset:self.metadata_offset + size])
+
+
+    def __getstate__(self):
+        # worker processes map the file themselves
+        return self.path
+
+    def __setstate__(self, path):
+        self.__init__(path)
+
+
+    def __len__(self):
+        return self.record_count
+
+
+    def __contains__(self, key):
+        return self.find(*key) is not None
+
+
+    def check(self, phonemes):
+        ''' raise an error if the file was written for other phonemes '''
+        if self.inventory != [p['IPA'] for p in phonemes]:
+            raise ValueError('Lexicon was written for a different language')
+
+
+    def find(self, translation, pos):
+        ''' the record number and metadata for a key, or None '''
+        key_hash = get_hash(translation, pos)
+        mask = self.slot_count - 1
+        slot = key_hash & mask
+        while True:
+            slot_hash, number = SLOT.unpack_from(
+                self.map, HEADER.size + slot * SLOT.size)
+            if not number:
+                return None
+            if slot_hash == key_hash:
+                data = self.get_metadata(number - 1)
+                if data[0] == translation and data[1] == pos:
+                    return number - 1, data
+            slot = (slot + 1) & mask
+
+
+    def get_metadata(self, number):
+        ''' the translation, pos, definition, and base tags of a record '''
+        (_, offset, size, _, _, _) = self.get_record(number)
+        start = self.metadata_offset + offset
+        return json.loads(self.map[start:start + size])
+
+
+    def get_record(self, number):
+        ''' the fixed-size record for a word '''
+        return RECORD.unpack_from(
+            self.map, self.records_offset + number * RECORD.size)
+
+
+    def get(self, translation, pos, phonemes):
+        ''' the Word for a key, or None. phonemes is the table of the
+        language the lexicon belongs to '''
+        found = self.find(translation, pos)
+        if found is None:
+            return None
+        number, (translation, pos, definition, base_tags) = found
+        return self.build_word(number, translation, pos, definition,
+                               base_tags, phonemes)
+
+
+    def build_word(self, number, translation, pos, definition, base_tags,
+                   phonemes):
+        ''' materialize a record as a Word '''
+        (word_id, _, _, offset, stem_size, lemma_size) = \
+            self.get_record(number)
+        start = self.blob_offset + offset
+        middle = start + stem_size
+        return load_word(pos, translation, word_id, definition, base_tags,
+                         phonemes.unpack(self.map[start:middle]),
+                         phonemes.unpack(self.map[middle:middle + lemma_size]),
+                         phonemes)
+
+
+    def words(self, phonemes):
+        ''' yield every Word in the file '''
+        for number in range(self.record_count):
+            translation, pos, definition, base_tags = \
+                self.get_metadata(number)
+            yield self.build_word(number, translation, pos, definition,
+                                  base_tags, phonemes)
+
+
+    def close(self):
+        ''' unmap the file '''
+        self.map.close()
@@ -1,12 +1,23 @@
 ''' create syllables out of phonemes and probabalistic structure '''
 from foreigntongue.phonemes import vowels as ipa_vowels
 from foreigntongue.phonemes import consonants as ipa_consonants
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, repeat
+import math
 import random
 
 class Syllables(object):
     ''' Generate syllables that fit a language pattern '''
 
-    def __init__(self):
+    # the precomputed syllables, when they're drawn from an inventory
+    inventory = None
+
+    def __init__(self, rng=None):
+        # all randomness comes from this, so a seeded random.Random gives a
+        # reproducible set of syllables. By default it's the random module
+        self.random = random if rng is None else rng
+
         # -------  PICK LETTERS
         ''' Notes:
          - Only uses pulmonic consonants. 27% of langauges contain nonpulmonic
@@ -22,15 +33,15 @@ class Syllables(object):
          '''
 
         # a phone looks like ['/m/', ['/m/']] -> [IPA, [transcription choices]]
-        v_count = int(random.normalvariate(5, 2)) + 3 or 2
+        v_count = int(self.random.normalvariate(5, 2)) + 3 or 2
         while 2 > v_count > len(ipa_vowels) - 2:
-            v_count = int(random.normalvariate(5, 2)) + 3 or 2
-        vowels = random.sample(ipa_vowels, v_count)
+            v_count = int(self.random.normalvariate(5, 2)) + 3 or 2
+        vowels = self.random.sample(ipa_vowels, v_count)
 
-        c_count = int(random.normalvariate(22, 3)) or 6
+        c_count = int(self.random.normalvariate(22, 3)) or 6
         while 3 > c_count > len(ipa_consonants) - 3:
-            c_count = int(random.normalvariate(22, 3)) or 6
-        consonants = random.sample(ipa_consonants, c_count)
+            c_count = int(self.random.normalvariate(22, 3)) or 6
+        consonants = self.random.sample(ipa_consonants, c_count)
 
         # assign them frequencies
         ''' Notes:
@@ -43,31 +54,30 @@ class Syllables(object):
         frequency = lambda rank: float(v_count + c_count) / rank
 
         # list of all letters
-        letters = random.sample(vowels + consonants, v_count + c_count)
-        letters = [{'IPA': l[0], 'latin': l[1], 'freq': frequency(i + 1)} \
-                        for i, l in enumerate(letters)]
+        letters = self.random.sample(vowels + consonants, v_count + c_count)
 
         # vary up the orthography for similar phonemes
         graphemes = []
-        for letter in letters:
-            choices = letter['latin']
-            success = False
+        transcriptions = []
+        for (_, choices) in letters:
+            latin = choices[0]
             for choice in choices:
                 if choice in graphemes:
                     continue
-                letter['latin'] = choice
+                latin = choice
                 graphemes.append(choice)
-                success = True
                 break
-            if not success:
-                letter['latin'] = letter['latin'][0]
+            transcriptions.append(latin)
 
-        # re-create the vowel and consonant list with the new data format
-        vowels = [v[0] for v in vowels]
-        consonants = [c[0] for c in consonants]
+        # the phoneme table. A phoneme's id is its index in this list, and
+        # id 0 is always the space between words in a phrase
+        self.phonemes = PhonemeTable([space] + [
+            Phoneme(i + 1, l[0], latin, frequency(i + 1),
+                    vowel=l[0] in all_vowels)
+            for i, (l, latin) in enumerate(zip(letters, transcriptions))])
 
-        self.vowels = [l for l in letters if l['IPA'] in vowels]
-        self.consonants = [l for l in letters if l['IPA'] in consonants]
+        self.vowels = [l for l in self.phonemes if l.vowel]
+        self.consonants = [l for l in self.phonemes[1:] if not l.vowel]
 
         ''' this allows words to join into phrases without having to remember
         the non-obvious format in which letters are stored. '''
@@ -86,12 +96,12 @@ class Syllables(object):
         def syllable_frequency_calculator(obligatory=False):
             ''' determine if a coda or onset is used and if so how '''
             # obligatory, optional, or restricted, weighted against restricted
-            option = random.choice([0, 1, 1, 2, 2])
+            option = self.random.choice([0, 1, 1, 2, 2])
             if not obligatory and option < 2:
                 return option
             else:
                 # the frequency at which it is used, if optional
-                freq = random.normalvariate(0.7, 0.12)
+                freq = self.random.normalvariate(0.7, 0.12)
                 if freq <= 0:
                     return 0.1
                 elif freq >= 1:
@@ -103,45 +113,565 @@ class Syllables(object):
         self.coda_frequency = syllable_frequency_calculator(
             obligatory=(not self.onset_frequency))
 
+        # weighted samplers for vowels and consonants, built on first use
+        self.samplers = {}
+
+
+    @classmethod
+    def from_spec(cls, spec, rng=None):
+        ''' the syllables described by get_spec, without drawing anything '''
+        syllables = cls.__new__(cls)
+        syllables.random = random if rng is None else rng
+        native = len(spec['phonemes']) + 1 - spec.get('borrowed', 0)
+        syllables.phonemes = PhonemeTable([space] + [
+            Phoneme(i + 1, ipa, latin, freq, vowel=vowel) \
+            for i, (ipa, latin, freq, vowel) in enumerate(spec['phonemes'])],
+            native)
+        syllables.vowels = [l for l in syllables.phonemes[:native] \
+                            if l.vowel]
+        syllables.consonants = [l for l in syllables.phonemes[1:native] \
+                                if not l.vowel]
+        syllables.onset_frequency = spec['onset_frequency']
+        syllables.coda_frequency = spec['coda_frequency']
+        syllables.samplers = {}
+        return syllables
+
+
+    def get_spec(self):
+        ''' the phonology, as data that can be stored as JSON '''
+        return {
+            'phonemes': [[p['IPA'], p['latin'], p['freq'], p.vowel] \
+                         for p in self.phonemes[1:]],
+            'borrowed': len(self.phonemes) - self.phonemes.native,
+            'onset_frequency': self.onset_frequency,
+            'coda_frequency': self.coda_frequency,
+        }
+
+
+    def get_syllable(self, rng=None):
+        ''' form a syllable based on defined frequencies. The draws come
+        from rng if it's given, instead of the language's own randomness '''
+        rng = rng or self.random
+        if self.inventory is not None:
+            return self.get_inventory().pick(rng)
 
-    def get_syllable(self):
-        ''' form a syllable based on defined frequencies '''
-        syllable = []
-        #onset
-        if random.random() < self.onset_frequency:
-            syllable.append(self.pick_consonant())
-        # nucleus
-        syllable.append(self.pick_vowel())
+        #onset and nucleus
+        if rng.random() < self.onset_frequency:
+            syllable = (self.pick_consonant(rng), self.pick_vowel(rng))
+        else:
+            syllable = (self.pick_vowel(rng),)
         #coda
-        if random.random() < self.coda_frequency:
-            syllable.append(self.pick_consonant())
+        if rng.random() < self.coda_frequency:
+            syllable += (self.pick_consonant(rng),)
         return syllable
 
 
-    def pick_vowel(self):
+    def get_syllables(self, count):
+        ''' form many syllables at once. The same frequencies are used as in
+        get_syllable, but letters are drawn for the whole batch in one go and
+        kept as index arrays until a syllable is actually read '''
+        if self.inventory is not None:
+            inventory = self.get_inventory()
+            picks = inventory.pick_indexes(count, self.random)
+            parts = [array('h', [inventory.parts[i][part] for i in picks]) \
+                     for part in range(3)]
+            return SyllableBatch(*parts, vowels=inventory.vowels,
+                                 consonants=inventory.consonants)
+
+        vowels = self.get_sampler('vowels')
+        consonants = self.get_sampler('consonants')
+
+        def draw_optional(frequency):
+            ''' consonant indexes, or -1 where the slot is empty '''
+            if frequency <= 0:
+                return array('h', repeat(-1, count))
+            if frequency >= 1:
+                return array('h', consonants.pick_indexes(count))
+            rand = self.random.random
+            present = [rand() < frequency for _ in repeat(None, count)]
+            picks = iter(consonants.pick_indexes(sum(present)))
+            return array('h', [next(picks) if p else -1 for p in present])
+
+        onsets = draw_optional(self.onset_frequency)
+        nuclei = array('h', vowels.pick_indexes(count))
+        codas = draw_optional(self.coda_frequency)
+        return SyllableBatch(onsets, nuclei, codas,
+                             vowels.snapshot, consonants.snapshot)
+
+
+    def use_inventory(self):
+        ''' draw each syllable from a SyllableInventory of every possible
+        syllable, with one random number, instead of letter by letter. The
+        frequencies are the same, but a seed gives different syllables '''
+        self.inventory = SyllableInventory(self.vowels, self.consonants,
+                                           self.onset_frequency,
+                                           self.coda_frequency)
+        return self.inventory
+
+
+    def get_inventory(self):
+        ''' the syllable inventory, which is rebuilt if the letters or
+        frequencies have changed '''
+        if self.inventory.is_stale(self.vowels, self.consonants,
+                                   self.onset_frequency, self.coda_frequency):
+            self.use_inventory()
+        return self.inventory
+
+
+    def encode(self, syllable):
+        ''' the compact form of a syllable, as a bytes string of phoneme ids '''
+        return self.phonemes.encode(syllable)
+
+
+    def decode(self, syllable_ids):
+        ''' the phonemes for a compact syllable '''
+        return self.phonemes.decode(syllable_ids)
+
+
+    def pick_vowel(self, rng=None):
         ''' select from the phonology of this language '''
-        return pick_letter(self.vowels)
+        return self.get_sampler('vowels').pick(rng)
 
 
-    def pick_consonant(self):
+    def pick_consonant(self, rng=None):
         ''' select from the phonology of this language '''
-        return pick_letter(self.consonants)
+        return self.get_sampler('consonants').pick(rng)
+
+
+    def get_sampler(self, letter_set):
+        ''' the sampler for 'vowels' or 'consonants', which is rebuilt if
+        the list was replaced or the letters in it have changed '''
+        letters = getattr(self, letter_set)
+        sampler = self.samplers.get(letter_set)
+        if sampler is None or sampler.letters is not letters \
+                or sampler.is_stale():
+            sampler = WeightedSampler(letters, self.random)
+            self.samplers[letter_set] = sampler
+        return sampler
+
+
+class Phoneme(dict):
+    ''' a phoneme in the inventory of a language. For compatibility this is
+    still a dict of IPA, latin, and freq, but it also has an id that is its
+    index in the language's phoneme table, a vowel flag, and its IPA and
+    latin forms without slashes. Edits are counted so that anything
+    precomputed from the frequencies can tell that it is out of date. '''
+    __slots__ = ('id', 'vowel', 'ipa', 'latin')
+    generation = 0
+
+    def __init__(self, phoneme_id, ipa, latin, freq, vowel=False):
+        dict.__init__(self, IPA=ipa, latin=latin, freq=freq)
+        self.id = phoneme_id
+        self.vowel = vowel
+        self.refresh()
+
+
+    def refresh(self):
+        ''' update the stripped forms from the dict view '''
+        self.ipa = self['IPA'].replace('/', '')
+        self.latin = self['latin'].replace('/', '')
+
+
+    def __reduce__(self):
+        return (Phoneme, (self.id, self['IPA'], self['latin'], self['freq'],
+                          self.vowel))
+
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self.refresh()
+        Phoneme.generation += 1
+
+
+    def update(self, *args, **kwargs):
+        dict.update(self, *args, **kwargs)
+        self.refresh()
+        Phoneme.generation += 1
+
+
+class PhonemeTable(list):
+    ''' the phonemes of a language, indexed by id. Compact syllables are
+    interned here, so every word that uses a syllable shares one copy.
+    The first native phonemes are the language's own. Any after those were
+    borrowed from rules that use letters from elsewhere (see borrow). '''
+
+    # a phoneme id that is never used, for separating words or syllables in
+    # a blob of ids
+    separator = 255
+
+    def __init__(self, phonemes, native=None):
+        list.__init__(self, phonemes)
+        self.native = len(self) if native is None else native
+        self.borrowed = {self.describe(p): p.id for p in self[self.native:]}
+        self.syllables = {}
+        self.decoded = {}
+        self.build_graphemes()
+
+
+    def build_graphemes(self):
+        ''' the slash-free latin and IPA strings for every phoneme id, padded
+        out so that any byte can be looked up '''
+        self.generation = Phoneme.generation
+        padding = [''] * (256 - len(self))
+        self.graphemes = {
+            'latin': [p.latin for p in self] + padding,
+            'ipa': [p.ipa for p in self] + padding,
+        }
+        for strings in self.graphemes.values():
+            strings[self.separator] = '\n'
+
+
+    def get_graphemes(self, script):
+        ''' the list of strings, indexed by phoneme id, for 'latin' or 'ipa' '''
+        if self.generation != Phoneme.generation:
+            self.build_graphemes()
+        return self.graphemes[script]
+
+
+    def render(self, syllable_ids, script='latin'):
+        ''' write out a tuple of phoneme id strings '''
+        graphemes = self.get_graphemes(script)
+        return ''.join(map(graphemes.__getitem__, b''.join(syllable_ids)))
+
+
+    def encode(self, syllable):
+        ''' a syllable as a bytes string of phoneme ids. Letters that aren't
+        phonemes of this table, like a plain dict or a phoneme of another
+        language, are borrowed into it '''
+        try:
+            syllable_ids = bytes([letter.id for letter in syllable])
+        except AttributeError:
+            syllable_ids = None
+        if syllable_ids is not None:
+            size = len(self)
+            for (phoneme_id, letter) in zip(syllable_ids, syllable):
+                if phoneme_id >= size or self[phoneme_id] is not letter:
+                    syllable_ids = None
+                    break
+        if syllable_ids is None:
+            syllable_ids = bytes([self.borrow(letter) for letter in syllable])
+        return self.intern(syllable_ids)
+
+
+    def borrow(self, letter):
+        ''' the id of a letter, which is added to the end of the table as a
+        new phoneme if it isn't one of its phonemes. Letters with the same
+        IPA, latin, frequency, and vowel flag share a borrowed phoneme, which
+        is equal to them as a dict. Borrowed phonemes are never drawn for new
+        syllables '''
+        phoneme_id = getattr(letter, 'id', None)
+        if phoneme_id is not None and phoneme_id < len(self) and \
+                self[phoneme_id] is letter:
+            return phoneme_id
+        description = self.describe(letter)
+        if description not in self.borrowed:
+            if len(self) >= self.separator:
+                raise ValueError('A language can\'t have more than %d '
+                                 'phonemes' % self.separator)
+            self.borrowed[description] = len(self)
+            self.append(Phoneme(len(self), *description))
+            self.build_graphemes()
+        return self.borrowed[description]
+
+
+    def describe(self, letter):
+        ''' the IPA, latin, frequency, and vowel flag of a letter, which can
+        be a plain dict '''
+        ipa = letter.get('IPA', letter.get('ipa', ''))
+        vowel = getattr(letter, 'vowel', None)
+        if vowel is None:
+            vowel = ipa in all_vowels
+        return (ipa, letter.get('latin', ''), letter.get('freq', 0), vowel)
+
+
+    def decode(self, syllable_ids):
+        ''' the tuple of phonemes for a bytes string of ids. Each syllable
+        is only decoded once, and shared by everything that decodes it '''
+        syllable = self.decoded.get(syllable_ids)
+        if syllable is None:
+            syllable = tuple(self[i] for i in syllable_ids)
+            self.decoded[syllable_ids] = syllable
+        return syllable
+
+
+    def intern(self, syllable_ids):
+        ''' the shared copy of a compact syllable '''
+        return self.syllables.setdefault(syllable_ids, syllable_ids)
+
+
+    def pack(self, syllable_ids):
+        ''' compact syllables as one blob of ids, each ended by the
+        separator, for storing them '''
+        end = bytes([self.separator])
+        return b''.join(s + end for s in syllable_ids)
+
+
+    def unpack(self, blob):
+        ''' the interned syllables in a blob created by pack '''
+        return tuple(map(self.intern,
+                         bytes(blob).split(bytes([self.separator]))[:-1]))
+
 
+class WeightedSampler(object):
+    ''' weighted random choice from a list of letters. The cumulative
+    frequencies are computed once, so a pick is a binary search rather than
+    re-summing and scanning the whole list '''
 
-all_vowels = [vo[0] for vo in ipa_vowels]
+    def __init__(self, letters, rng=random):
+        self.letters = letters
+        self.random = rng
+        self.build()
+
+
+    def build(self):
+        ''' precompute the running total of frequencies '''
+        self.snapshot = list(self.letters)
+        self.generation = Phoneme.generation
+        self.cumulative = list(accumulate(l['freq'] for l in self.snapshot))
+        self.total = self.cumulative[-1] if self.cumulative else 0
+        if self.snapshot and not self.total:
+            # nothing has any weight, so always pick the first letter, as
+            # pick_letter used to
+            self.cumulative = [1] * len(self.snapshot)
+            self.total = 1
+        self.indexes = range(len(self.snapshot))
+
+
+    def is_stale(self):
+        ''' has a letter been added, removed, or re-weighted since build '''
+        return self.generation != Phoneme.generation or \
+            self.snapshot != self.letters
+
+
+    def pick(self, rng=None):
+        ''' weighted random choice, drawing from rng if it's given '''
+        r = (rng or self.random).random() * self.total
+        return self.snapshot[bisect_right(self.cumulative, r)]
+
+
+    def pick_indexes(self, count):
+        ''' many weighted choices at once, as indexes into the letter list.
+        These are the choices random.choices would make with the same
+        random numbers, without looking each one up in a population '''
+        cumulative = self.cumulative
+        total = cumulative[-1] + 0.0
+        last = len(cumulative) - 1
+        rand = self.random.random
+        return [bisect_right(cumulative, rand() * total, 0, last) \
+                for _ in repeat(None, count)]
+
+
+class SyllableInventory(object):
+    ''' Every syllable a language can form, (onset) + vowel + (coda), with
+    its exact probability under the language's onset and coda frequencies
+    and letter frequencies. Syllables are tuples of phonemes, shared by
+    every draw, and are drawn in constant time from an alias table. '''
+
+    def __init__(self, vowels, consonants, onset_frequency, coda_frequency):
+        self.vowels = list(vowels)
+        self.consonants = list(consonants)
+        self.onset_frequency = onset_frequency
+        self.coda_frequency = coda_frequency
+        self.generation = Phoneme.generation
+
+        vowel_total = float(sum(v['freq'] for v in self.vowels))
+        onsets = self.get_options(onset_frequency)
+        codas = self.get_options(coda_frequency)
+
+        self.syllables = []
+        self.probabilities = []
+        # the onset, vowel, and coda indexes of each syllable
+        self.parts = []
+        for (onset, onset_chance) in onsets:
+            for (nucleus, vowel) in enumerate(self.vowels):
+                vowel_chance = vowel['freq'] / vowel_total
+                for (coda, coda_chance) in codas:
+                    letters = [vowel]
+                    if onset >= 0:
+                        letters.insert(0, self.consonants[onset])
+                    if coda >= 0:
+                        letters.append(self.consonants[coda])
+                    self.syllables.append(tuple(letters))
+                    self.probabilities.append(
+                        onset_chance * vowel_chance * coda_chance)
+                    self.parts.append((onset, nucleus, coda))
+
+        # by the phoneme ids of each syllable
+        self.indexes = {tuple(p.id for p in s): i \
+                        for (i, s) in enumerate(self.syllables)}
+        self.build_alias()
+
+
+    def __len__(self):
+        return len(self.syllables)
+
+
+    def get_options(self, frequency):
+        ''' (consonant index, chance) for an onset or coda, where -1 is no
+        consonant at all '''
+        frequency = min(max(frequency, 0), 1)
+        total = float(sum(c['freq'] for c in self.consonants))
+        options = []
+        if frequency < 1:
+            options.append((-1, 1 - frequency))
+        if frequency > 0 and total:
+            options += [(i, frequency * c['freq'] / total) \
+                        for (i, c) in enumerate(self.consonants)]
+        return options
+
+
+    def build_alias(self):
+        ''' Vose's alias table: each slot has a cutoff and an alias, so a
+        draw is one slot picked uniformly and one comparison '''
+        count = len(self.probabilities)
+        scaled = [p * count for p in self.probabilities]
+        self.cutoffs = [1.0] * count
+        self.aliases = list(range(count))
+        small = [i for (i, p) in enumerate(scaled) if p < 1]
+        large = [i for (i, p) in enumerate(scaled) if p >= 1]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            self.cutoffs[less] = scaled[less]
+            self.aliases[less] = more
+            scaled[more] += scaled[less] - 1
+            (small if scaled[more] < 1 else large).append(more)
+
+
+    def is_stale(self, vowels, consonants, onset_frequency, coda_frequency):
+        ''' were these the letters and frequencies it was built from '''
+        return self.generation != Phoneme.generation or \
+            self.vowels != vowels or self.consonants != consonants or \
+            self.onset_frequency != onset_frequency or \
+            self.coda_frequency != coda_frequency
+
+
+    def pick_index(self, rng=random):
+        ''' the index of a random syllable, from a single random number '''
+        slot = rng.random() * len(self.cutoffs)
+        index = int(slot)
+        if slot - index < self.cutoffs[index]:
+            return index
+        return self.aliases[index]
+
+
+    def pick(self, rng=random):
+        ''' a random syllable '''
+        return self.syllables[self.pick_index(rng)]
+
+
+    def pick_indexes(self, count, rng=random):
+        ''' the indexes of many random syllables '''
+        pick_index = self.pick_index
+        return [pick_index(rng) for _ in repeat(None, count)]
+
+
+    def get_probability(self, syllable):
+        ''' the chance of drawing a syllable, given as letters '''
+        index = self.indexes.get(tuple(p.id for p in syllable))
+        return 0.0 if index is None else self.probabilities[index]
+
+
+    def get_entropy(self):
+        ''' the entropy of a syllable, in bits '''
+        return -sum(p * math.log2(p) for p in self.probabilities if p > 0)
+
+
+    def get_collision_rate(self, words, length):
+        ''' the chance that any two of a number of random words with length
+        syllables come out the same, by the birthday bound. This only
+        counts words made of the same syllables, not ones that happen to
+        be spelled the same with the syllables split differently '''
+        same = sum(p * p for p in self.probabilities) ** length
+        return 1 - math.exp(-words * (words - 1) / 2.0 * same)
+
+
+class SyllableBatch(object):
+    ''' syllables stored as parallel arrays of letter indexes, where -1 means
+    there is no onset or coda. Tuples of letters are only built on access. '''
+
+    def __init__(self, onsets, nuclei, codas, vowels, consonants):
+        self.onsets = onsets
+        self.nuclei = nuclei
+        self.codas = codas
+        self.vowels = vowels
+        self.consonants = consonants
+
+
+    def __len__(self):
+        return len(self.nuclei)
+
+
+    def __getitem__(self, index):
+        ''' the syllable at this position, in the same format as
+        Syllables.get_syllable '''
+        syllable = (self.vowels[self.nuclei[index]],)
+        onset = self.onsets[index]
+        if onset >= 0:
+            syllable = (self.consonants[onset],) + syllable
+        coda = self.codas[index]
+        if coda >= 0:
+            syllable += (self.consonants[coda],)
+        return syllable
+
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+
+    def get_ids(self, index):
+        ''' the syllable at this position as a bytes string of phoneme ids '''
+        return bytes(letter.id for letter in self[index])
+
+
+    def encode(self, phonemes):
+        ''' every syllable, as the compact syllables interned in a phoneme
+        table. A batch only has so many distinct (onset, nucleus, coda)
+        combinations, so each is encoded once, and the rest are looked up
+        without building tuples of letters '''
+        encoded = EncodedSyllables(self, phonemes)
+        return list(map(encoded.__getitem__,
+                        zip(self.onsets, self.nuclei, self.codas)))
+
+
+class EncodedSyllables(dict):
+    ''' the compact syllable for each (onset, nucleus, coda) of letter
+    indexes in a SyllableBatch, encoded the first time it's looked up '''
+
+    def __init__(self, batch, phonemes):
+        dict.__init__(self)
+        self.batch = batch
+        self.phonemes = phonemes
+
+
+    def __missing__(self, parts):
+        onset, nucleus, coda = parts
+        batch = self.batch
+        syllable = (batch.vowels[nucleus],)
+        if onset >= 0:
+            syllable = (batch.consonants[onset],) + syllable
+        if coda >= 0:
+            syllable += (batch.consonants[coda],)
+        self[parts] = self.phonemes.encode(syllable)
+        return self[parts]
+
+
+all_vowels = frozenset(vo[0] for vo in ipa_vowels)
 def is_vowel(phoneme):
-    ''' check if a phoneme is a vowel. Could be written in
-    a more efficient way for sure '''
-    return phoneme['IPA'] in all_vowels
-
-
-def pick_letter(letter_set):
-    ''' weighted random choice '''
-    total_weight = sum(l['freq'] for l in letter_set)
-    r = random.uniform(0, total_weight)
-    upto = 0
-    for letter in letter_set:
-        if upto + letter['freq'] >= r:
-            return letter
-        upto += letter['freq']
+    ''' check if a phoneme is a vowel '''
+    try:
+        return phoneme.vowel
+    except AttributeError:
+        return phoneme['IPA'] in all_vowels
+
+
+# the space between words in a phrase, which is in every phoneme table
+space = Phoneme(0, ' ', ' ', 0)
+
+
+def pick_letter(letter_set, rng=random):
+    ''' weighted random choice from an arbitrary list of letters. Languages
+    keep a WeightedSampler instead of calling this for every letter '''
+    return WeightedSampler(letter_set, rng).pick()
 
@@ -4,22 +4,32 @@ from foreigntongue.pos import pos_lookup
 
 class Word(object):
     ''' a foreign word and its metadata '''
+    __slots__ = ('pos', 'display_pos', 'id', 'base_tags', 'phonemes',
+                 'stem_ids', 'lemma_ids', 'translation', 'definition',
+                 'rendered_lemma', 'renders', 'forms')
 
-    def __init__(self, pos, syllables, translation, definition=None, base_tags=None):
+    def __init__(self, pos, syllables, translation, definition=None,
+                 base_tags=None, phonemes=None, word_id=None):
         self.pos = pos
         self.display_pos = pos_lookup[pos] if pos in pos_lookup else pos
 
         # (hopefully) unique identifier
-        self.id = random.randint(100000000, 999999999)
+        self.id = word_id if word_id is not None else \
+                  random.randint(100000000, 999999999)
 
         # grammatical tags that ALWAYS apply to this word, ie pos and gender
         self.base_tags = [pos] + base_tags if base_tags else []
 
+        # the phoneme table of the language, if there is one. Syllables are
+        # stored as bytes strings of ids into this table, and only turned
+        # back into lists of phonemes when stem or lemma are read
+        self.phonemes = phonemes
+
         # this is the baseline list of syllables before any inflection
         self.stem = syllables
 
         # we can't tell what the word actually looks like without grammar
-        self.lemma = None
+        self.lemma_ids = None
 
         # equivalent translation word, if available
         self.translation = translation
@@ -27,6 +37,67 @@ class Word(object):
         # a longer-form definition
         self.definition = definition
 
+        # rendered text of the lemma, and the lemma it was rendered from
+        self.rendered_lemma = None
+        self.renders = None
+
+        # the inflector and stem that paradigm worked from, and the
+        # paradigms it worked out, by script
+        self.forms = None
+
+
+    @property
+    def stem(self):
+        ''' the syllables of the uninflected word '''
+        return self.decode(self.stem_ids)
+
+    @stem.setter
+    def stem(self, syllables):
+        self.stem_ids = self.encode(syllables)
+
+
+    @property
+    def lemma(self):
+        ''' the syllables of the word with its base tags applied '''
+        return self.decode(self.lemma_ids)
+
+    @lemma.setter
+    def lemma(self, syllables):
+        self.lemma_ids = self.encode(syllables)
+
+
+    def encode(self, syllables):
+        ''' syllables as a tuple of bytes strings of phoneme ids '''
+        if syllables is None:
+            return syllables
+        if self.phonemes is None:
+            return tuple(tuple(syllable) for syllable in syllables)
+        return tuple(self.phonemes.encode(syllable) for syllable in syllables)
+
+
+    def decode(self, syllable_ids):
+        ''' the tuple of syllables for a tuple of phoneme id strings '''
+        if syllable_ids is None or self.phonemes is None:
+            return syllable_ids
+        return tuple(map(self.phonemes.decode, syllable_ids))
+
+
+    def render(self, script='latin'):
+        ''' the lemma written in 'latin' or 'ipa'. This is remembered until
+        the lemma changes '''
+        if self.rendered_lemma is not self.lemma_ids or self.renders is None:
+            self.rendered_lemma = self.lemma_ids
+            self.renders = {}
+        if script not in self.renders:
+            if self.phonemes is None:
+                key = 'IPA' if script == 'ipa' else script
+                text = ''.join(l[key] for s in self.lemma for l in s)
+                self.renders[script] = text.replace('/', '')
+            else:
+                self.renders[script] = self.phonemes.render(self.lemma_ids,
+                                                            script)
+        return self.renders[script]
+
 
     def set_definition(self, definition):
         ''' allows a definition to be added after a word is created '''
@@ -41,7 +112,7 @@ class Word(object):
         ''' perform inflection '''
         tags = self.base_tags
         if additional_tags:
-            tags += additional_tags
+            tags = tags + list(additional_tags)
 
         syllables = self.stem
         for rule in rules:
@@ -49,3 +120,40 @@ class Word(object):
             syllables = rule.apply(syllables, tags)
 
         return syllables
+
+
+    def paradigm(self, inflector, script=None):
+        ''' every form of the word under a language's compiled rules (see
+        Language.compile_rules), as a dict of the tags added to the base tags
+        to the syllable ids of the form, or its text in script. The first
+        form is the lemma, with no tags added. Paradigms are worked out once
+        and remembered until the rules or the stem change '''
+        if self.forms is None or self.forms[0] is not inflector or \
+                self.forms[1] is not self.stem_ids:
+            self.forms = (inflector, self.stem_ids, {})
+        paradigms = self.forms[2]
+
+        paradigm = paradigms.get(script)
+        if paradigm is None:
+            if script is None:
+                paradigm = {tags: inflector.inflect(self.stem_ids,
+                                                    self.base_tags + list(tags))
+                            for tags in inflector.get_tag_sets(self.base_tags)}
+            else:
+                render = self.phonemes.render
+                paradigm = {tags: render(form, script) for (tags, form) in \
+                            self.paradigm(inflector).items()}
+            paradigms[script] = paradigm
+        return dict(paradigm)
+
+
+def load_word(pos, translation, word_id, definition, base_tags, stem_ids,
+              lemma_ids, phonemes):
+    ''' a Word as it was stored, like in a snapshot or a lexicon file, with
+    its base tags and the interned syllables of its stem and lemma '''
+    word = Word(pos, None, translation, definition=definition,
+                phonemes=phonemes, word_id=word_id)
+    word.base_tags = base_tags
+    word.stem_ids = stem_ids
+    word.lemma_ids = lemma_ids
+    return word
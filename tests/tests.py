@@ -1,6 +1,25 @@
 ''' test language creation '''
 from foreigntongue import Language, Syllables, Word
+from foreigntongue import get_latin, get_ipa, render_many
 from foreigntongue.inflection import Rule, Affix, Prefix, StemChange
+from foreigntongue.syllable import WeightedSampler, Phoneme, is_vowel
+from foreigntongue import export, farm, server, snapshot
+from foreigntongue.lexicon import Lexicon, BloomFilter
+from foreigntongue.similarity import edit_distance, NeighborIndex
+from foreigntongue.similarity import distance_within_one
+from array import array
+import asyncio
+import csv
+import io
+import json
+import math
+import os
+import pickle
+import tempfile
+import random
+import sqlite3
+import subprocess
+import sys
 import unittest
 
 class Tests(unittest.TestCase):
@@ -11,7 +30,7 @@ class Tests(unittest.TestCase):
         lang = Language()
         self.assertIsInstance(lang, Language)
         self.assertIsInstance(lang.syllables, Syllables)
-        self.assertIsInstance(lang.dictionary, dict)
+        self.assertIsInstance(lang.dictionary, Lexicon)
 
 
     def test_create_word(self):
@@ -35,6 +54,30 @@ class Tests(unittest.TestCase):
         self.assertEqual(len(lang.dictionary), 2)
 
 
+    def test_create_words(self):
+        ''' many words at once '''
+        lang = Language()
+        fish = lang.get_word('NN', 'fish')
+
+        words = lang.get_words([
+            ('NN', 'fish'),
+            ('VB', 'fish', 'to catch fish'),
+            ('NN', 'cat'),
+            ('VB', 'fish'),
+        ])
+        self.assertEqual(len(words), 4)
+        self.assertIs(words[0], fish)
+        self.assertIs(words[1], words[3])
+        self.assertIs(words[1], lang.get_word('VB', 'fish'))
+        self.assertEqual(words[1].definition, 'to catch fish')
+        self.assertEqual(len(lang.dictionary), 3)
+
+        # same rules as generating one at a time
+        for word in words:
+            self.assertTrue(len(word.stem) >= 1)
+            self.assertEqual(word.lemma, word.inflect(lang.rules))
+
+
     def test_pos_tags(self):
         ''' part of speech tagging and display '''
         lang = Language()
@@ -77,13 +120,53 @@ class Tests(unittest.TestCase):
         self.assertIsInstance(consonant['latin'], str)
 
 
+    def test_phoneme_table(self):
+        ''' phonemes have compact ids and stripped forms '''
+        lang = Language()
+        syll = lang.syllables
+
+        for (i, phoneme) in enumerate(syll.phonemes):
+            self.assertIsInstance(phoneme, Phoneme)
+            self.assertEqual(phoneme.id, i)
+            self.assertNotIn('/', phoneme.latin)
+            self.assertEqual(phoneme.ipa, phoneme['IPA'].strip('/'))
+        for vowel in syll.vowels:
+            self.assertTrue(is_vowel(vowel))
+        for consonant in syll.consonants:
+            self.assertFalse(is_vowel(consonant))
+        self.assertTrue(is_vowel({'IPA': '/a/'}))
+
+        syllable = syll.get_syllable()
+        self.assertEqual(syll.decode(syll.encode(syllable)), syllable)
+
+        # words store their syllables as shared bytes strings of ids
+        word = lang.get_word('NN', 'fish')
+        self.assertIsInstance(word.stem_ids, tuple)
+        for syllable_ids in word.stem_ids + word.lemma_ids:
+            self.assertIsInstance(syllable_ids, bytes)
+            self.assertIs(syll.phonemes.intern(bytes(syllable_ids)),
+                          syllable_ids)
+        self.assertEqual(word.stem,
+                         tuple(syll.decode(s) for s in word.stem_ids))
+
+        # and are stored as one blob, with each syllable ended by the
+        # separator
+        blob = syll.phonemes.pack(word.lemma_ids)
+        self.assertEqual(blob.count(syll.phonemes.separator),
+                         len(word.lemma_ids))
+        unpacked = syll.phonemes.unpack(blob)
+        self.assertEqual(unpacked, word.lemma_ids)
+        self.assertTrue(all(a is b for (a, b) in
+                            zip(unpacked, word.lemma_ids)))
+
+
     def test_syllables(self):
         ''' sounds used in language '''
         lang = Language()
         syll = lang.syllables
 
         syllable = syll.get_syllable()
-        self.assertIsInstance(syllable, list)
+        self.assertIsInstance(syllable, tuple)
         self.assertTrue(len(syllable) > 0)
 
         self.assertIsInstance(syllable[0], dict)
@@ -93,6 +176,36 @@ class Tests(unittest.TestCase):
         self.assertIsInstance(syllable[0]['latin'], str)
 
 
+    def test_syllable_batch(self):
+        ''' many syllables at once '''
+        lang = Language()
+        syll = lang.syllables
+
+        batch = syll.get_syllables(50)
+        self.assertEqual(len(batch), 50)
+        self.assertEqual(len(batch.onsets), 50)
+        self.assertEqual(len(batch.codas), 50)
+
+        for syllable in batch:
+            self.assertIsInstance(syllable, tuple)
+            self.assertEqual(len([l for l in syllable if l in syll.vowels]), 1)
+            for letter in syllable:
+                self.assertTrue(letter in syll.vowels or \
+                                letter in syll.consonants)
+
+        encoded = batch.encode(syll.phonemes)
+        self.assertEqual(encoded, [syll.phonemes.encode(s) for s in batch])
+        self.assertEqual(encoded, [syll.phonemes.intern(batch.get_ids(i)) \
+                                   for i in range(50)])
+        self.assertTrue(all(s is syll.phonemes.intern(s) for s in encoded))
+
+        syll.onset_frequency = 0
+        syll.coda_frequency = 1
+        for syllable in syll.get_syllables(10):
+            self.assertIn(syllable[0], syll.vowels)
+            self.assertIn(syllable[1], syll.consonants)
+
+
     def test_auto_create_rules(self):
         ''' inflection rules '''
         lang = Language()
@@ -161,6 +274,959 @@ class Tests(unittest.TestCase):
         self.assertEqual(word.stem[1:], inflected[1:])
         self.assertIn(vowel, inflected[0])
 
+        # the stem isn't changed, and shares the syllables that weren't
+        stem = word.stem
+        inflected = rule.apply(stem, word.base_tags)
+        self.assertNotIn(vowel, stem[0])
+        for (before, after) in zip(stem[1:], inflected[1:]):
+            self.assertIs(before, after)
+
+
+    def test_weighted_sampler(self):
+        ''' letters are picked by frequency '''
+        letters = [{'IPA': '/a/', 'latin': '/a/', 'freq': 0},
+                   {'IPA': '/e/', 'latin': '/e/', 'freq': 1},
+                   {'IPA': '/o/', 'latin': '/o/', 'freq': 0}]
+        sampler = WeightedSampler(letters)
+        for _ in range(20):
+            self.assertIs(sampler.pick(), letters[1])
+
+        # with no weight at all, the first letter
+        letters[1]['freq'] = 0
+        sampler = WeightedSampler(letters)
+        for _ in range(20):
+            self.assertIs(sampler.pick(), letters[0])
+        self.assertEqual(sampler.pick_indexes(5), [0] * 5)
+
+
+    def test_sampler_rebuild(self):
+        ''' changing frequencies or the inventory updates the sampler '''
+        lang = Language()
+        syll = lang.syllables
+        syll.pick_vowel()
+
+        favorite = syll.vowels[-1]
+        for vowel in syll.vowels:
+            vowel['freq'] = 0
+        favorite['freq'] = 1
+        for _ in range(20):
+            self.assertIs(syll.pick_vowel(), favorite)
+
+        syll.consonants = syll.consonants[:1]
+        for _ in range(20):
+            self.assertIs(syll.pick_consonant(), syll.consonants[0])
+
+
+    def test_compiled_rules(self):
+        ''' compiled inflection matches applying the rules in order '''
+        lang = Language()
+        syll = lang.syllables
+        vowels = syll.vowels
+        lang.rules = [
+            Affix(['NN'], syll.get_syllable()),
+            StemChange(['NN', 'plural'], -1, vowels[0]),
+            Prefix(['VB'], syll.get_syllable()),
+            StemChange(['VB'], 0, vowels[-1]),
+            StemChange(['VB', 'past'], -1, vowels[-1]),
+            Affix(['VB', 'past'], syll.get_syllable()),
+            Prefix(['JJ'], syll.get_syllable()),
+            StemChange(['JJ'], 2, vowels[0]),
+        ]
+        tag_sets = [['NN'], ['NN', 'plural'], ['VB'], ['VB', 'past'],
+                    ['JJ'], ['RB'], []]
+
+        for i in range(30):
+            word = lang.get_word('NN', 'word%d' % i)
+            for tags in tag_sets:
+                word.base_tags = tags
+                expected = word.stem
+                try:
+                    for rule in lang.rules:
+                        expected = rule.apply(expected, tags)
+                except IndexError:
+                    # the stem is too short for the stem change
+                    with self.assertRaises(IndexError):
+                        lang.inflect(word)
+                    continue
+
+                compiled = lang.inflect(word)
+                self.assertEqual(tuple(syll.decode(s) for s in compiled),
+                                 expected)
+
+        inflector = lang.compile_rules()
+        self.assertIs(inflector, lang.compile_rules())
+        lang.rules = lang.rules[:1]
+        self.assertIsNot(inflector, lang.compile_rules())
+
+        # rules can use a plain dict, or letters from another language,
+        # which are borrowed into the phoneme table
+        lang = Language(seed=5)
+        affix = Language(seed=6).syllables.get_syllable()
+        vowel = {'IPA': 'ɯ', 'latin': 'ü', 'freq': 1}
+        lang.rules = [StemChange(['NN'], 0, vowel), Affix(['NN'], affix)]
+        word = lang.get_word('NN', 'cat')
+        self.assertEqual(word.inflect(lang.rules), word.lemma)
+        self.assertIn('ü', get_latin(word))
+        self.assertTrue(get_latin(word).endswith(
+            ''.join(l.latin for l in affix)))
+        self.assertFalse(any(v == vowel for v in lang.syllables.vowels))
+
+        copied = snapshot.loads(snapshot.dumps(lang))
+        self.assertEqual(get_latin(copied.get_word('NN', 'cat')),
+                         get_latin(word))
+        self.assertEqual(get_latin(copied.get_word('NN', 'dog')),
+                         get_latin(lang.get_word('NN', 'dog')))
+
+
+    def test_render(self):
+        ''' writing out words '''
+        lang = Language()
+        words = lang.get_words([('NN', 'word%d' % i) for i in range(20)])
+        phrase = lang.get_phrase('LOC', words[:2], 'place')
+
+        for word in words + [phrase]:
+            latin = ''.join(l['latin'] for s in word.lemma for l in s)
+            ipa = ''.join(l['IPA'] for s in word.lemma for l in s)
+            self.assertEqual(get_latin(word), latin.replace('/', ''))
+            self.assertEqual(get_ipa(word), ipa.replace('/', ''))
+        self.assertIn(' ', get_latin(phrase))
+
+        self.assertEqual(render_many(lang.dictionary),
+                         [get_latin(w) for w in lang.dictionary.values()])
+        self.assertEqual(render_many(words, script='ipa'),
+                         [get_ipa(w) for w in words])
+        self.assertEqual(render_many([]), [])
+
+        # a new lemma is rendered again
+        word = words[0]
+        before = get_latin(word)
+        word.lemma = word.lemma + (lang.syllables.get_syllable(),)
+        self.assertNotEqual(get_latin(word), before)
+        self.assertTrue(get_latin(word).startswith(before))
+
+
+    def test_seed(self):
+        ''' a seed reproduces a language '''
+        def describe(lang):
+            words = lang.get_words([('NN', 'fish'), ('VB', 'run')])
+            words.append(lang.get_word('JJ', 'red'))
+            return [lang.get_stats(), [str(r.tags) for r in lang.rules],
+                    [(w.id, get_ipa(w)) for w in words]]
+
+        first = Language(seed=42)
+        # other languages and the global random state don't interfere
+        other = Language(seed=7)
+        random.seed(1)
+        second = Language(seed=42)
+        other.get_word('NN', 'fish')
+        self.assertEqual(describe(first), describe(second))
+
+        rng = random.Random(42)
+        self.assertIs(Language(rng=rng).random, rng)
+
+
+    def test_seed_across_processes(self):
+        ''' a seed gives the same language in a new interpreter '''
+        script = 'from foreigntongue import Language, get_ipa;' \
+                 'lang = Language(seed="abc");' \
+                 'print(get_ipa(lang.get_word("NN", "fish")))'
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        outputs = set()
+        for hash_seed in ['1', '2']:
+            outputs.add(subprocess.check_output(
+                [sys.executable, '-c', script],
+                env={'PYTHONHASHSEED': hash_seed, 'PYTHONPATH': root}))
+        self.assertEqual(len(outputs), 1)
+
+
+    def test_farm(self):
+        ''' building languages in parallel '''
+        seeds = list(range(5))
+        entries = [('NN', 'fish'), ('VB', 'swim', 'to move through water')]
+
+        serial = list(farm.generate(seeds, entries, workers=0))
+        parallel = list(farm.generate(seeds, entries, workers=2,
+                                      chunksize=2, max_pending=1))
+        self.assertEqual([s for (s, _) in serial], seeds)
+        self.assertEqual(serial, parallel)
+
+        for (seed, lang) in farm.generate_languages(seeds[:2], entries,
+                                                    workers=0):
+            original = Language(seed=seed)
+            original.get_words(entries)
+            self.assertEqual(get_ipa(lang.get_word('NN', 'fish')),
+                             get_ipa(original.get_word('NN', 'fish')))
+            self.assertEqual(len(lang.dictionary), 2)
+
+
+    def test_snapshot(self):
+        ''' a language survives serialization '''
+        lang = Language(seed=3)
+        lang.get_words([('NN', 'word%d' % i) for i in range(30)])
+        lang.get_phrase('LOC', [lang.get_word('JJ', 'red'),
+                                lang.get_word('NN', 'hill')], 'Red Hill')
+        data = snapshot.dumps(lang)
+        state = lang.random.getstate()
+        copied = snapshot.loads(data)
+
+        # words are only built when they're looked up
+        self.assertEqual(copied.dictionary.pending, len(lang.dictionary))
+        self.assertIn(('word3', 'NN'), copied.dictionary)
+        self.assertEqual(copied.dictionary[('word3', 'NN')].lemma_ids,
+                         lang.dictionary[('word3', 'NN')].lemma_ids)
+        self.assertEqual(copied.dictionary.pending,
+                         len(lang.dictionary) - 1)
+        self.assertEqual([w.translation for w in copied.dictionary.by_pos('NN')],
+                         [w.translation for w in lang.dictionary.by_pos('NN')])
+        self.assertEqual(copied.dictionary.pending, 0)
+
+        copied = snapshot.loads(data)
+        self.assertEqual(snapshot.dumps(copied), data)
+        self.assertEqual(render_many(copied.dictionary),
+                         render_many(lang.dictionary))
+        for key, word in lang.dictionary.items():
+            self.assertEqual(copied.dictionary[key].stem_ids, word.stem_ids)
+            self.assertEqual(copied.dictionary[key].id, word.id)
+
+        # and carries on generating the same words
+        self.assertEqual(get_ipa(copied.get_word('VB', 'run')),
+                         get_ipa(lang.get_word('VB', 'run')))
+
+        with self.assertRaises(ValueError):
+            snapshot.loads(b'nope' + data[4:])
+
+        # the generator's state is packed into a section, not the JSON
+        start = snapshot.HEADER.size
+        spec = json.loads(data[start:start + snapshot.HEADER.unpack_from(
+            data, 0)[2]].decode('utf-8'))
+        self.assertEqual(len(spec['random']), 3)
+        self.assertIn(['random', 'I', 624 * array('I').itemsize],
+                      spec['sections'])
+        self.assertEqual(snapshot.loads(data).random.getstate(), state)
+
+        # words and phrases can be longer than 255 syllables
+        words = lang.get_words([('NN', 'long%d' % i) for i in range(100)])
+        phrase = lang.get_phrase('NNP', words, 'long name')
+        self.assertTrue(len(phrase.lemma_ids) > 255)
+        copied = snapshot.loads(snapshot.dumps(lang))
+        self.assertEqual(copied.dictionary[('long name', 'NNP')].lemma_ids,
+                         phrase.lemma_ids)
+
+
+    def test_save_load(self):
+        ''' a language can be saved to a file '''
+        lang = Language(seed='save')
+        lang.get_words([('NN', 'fish', 'a swimmer'), ('VB', 'run')])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'lang.ft')
+            lang.save(path)
+            loaded = Language.load(path)
+
+        self.assertIsInstance(loaded, Language)
+        self.assertEqual(loaded.get_stats(), lang.get_stats())
+        self.assertEqual(loaded.syllable_stats, lang.syllable_stats)
+        self.assertEqual(loaded.syllables.onset_frequency,
+                         lang.syllables.onset_frequency)
+        self.assertEqual(loaded.syllables.coda_frequency,
+                         lang.syllables.coda_frequency)
+        self.assertEqual([(type(r), r.tags) for r in loaded.rules],
+                         [(type(r), r.tags) for r in lang.rules])
+        self.assertEqual(loaded.get_word('NN', 'fish').definition,
+                         'a swimmer')
+
+        # inflection and new words come out the same
+        for word in ['fish', 'cat', 'hill']:
+            original = lang.get_word('NN', word)
+            copied = loaded.get_word('NN', word)
+            self.assertEqual(get_latin(copied), get_latin(original))
+            self.assertEqual(lang.inflect(original, ['plural']),
+                             loaded.inflect(copied, ['plural']))
+
+
+    def test_mapped_lexicon(self):
+        ''' words can be looked up in a shared lexicon file '''
+        lang = Language(seed='store')
+        words = lang.get_words([('NN', 'word%d' % i, 'def %d' % i) \
+                                for i in range(100)])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'lexicon.ftx')
+            lang.write_store(path)
+
+            reader = Language(seed='store')
+            lexicon = reader.open_store(path)
+            self.assertEqual(len(lexicon), 100)
+            self.assertIn(('word5', 'NN'), lexicon)
+            self.assertNotIn(('word5', 'VB'), lexicon)
+
+            # words are only built when they're asked for
+            self.assertEqual(len(reader.dictionary), 0)
+            word = reader.get_word('NN', 'word5')
+            self.assertEqual(len(reader.dictionary), 1)
+            self.assertEqual(word.id, words[5].id)
+            self.assertEqual(word.definition, 'def 5')
+            self.assertEqual(word.stem_ids, words[5].stem_ids)
+            self.assertEqual(get_latin(word), get_latin(words[5]))
+
+            found = reader.get_words([('NN', 'word7'), ('NN', 'new')])
+            self.assertEqual(found[0].id, words[7].id)
+            self.assertEqual(len(reader.dictionary), 3)
+
+            copied = pickle.loads(pickle.dumps(lexicon))
+            phonemes = reader.syllables.phonemes
+            self.assertEqual(copied.get('word9', 'NN', phonemes).id,
+                             words[9].id)
+
+            with self.assertRaises(ValueError):
+                Language(seed='other').open_store(path)
+            lexicon.close()
+            copied.close()
+
+
+    def test_lexicon(self):
+        ''' looking words up by key, pos, form, and id '''
+        lang = Language()
+        lexicon = lang.dictionary
+
+        # keys don't run together
+        first = lang.get_word('NN', 'fishN')
+        second = lang.get_word('NNN', 'fish')
+        self.assertIsNot(first, second)
+        self.assertIs(lexicon[('fishN', 'NN')], first)
+
+        words = lang.get_words([('VB', 'run'), ('VB', 'swim'), ('JJ', 'red')])
+        phrase = lang.get_phrase('LOC', words[:2], 'Runswim')
+        self.assertEqual(lexicon.by_pos('VB'), words[:2])
+        self.assertEqual(lexicon.by_pos('LOC'), [phrase])
+        self.assertEqual(lexicon.by_pos('CC'), [])
+
+        # ids are compact and unique
+        ids = [w.id for w in lexicon.values()]
+        self.assertEqual(sorted(ids), list(range(1, len(lexicon) + 1)))
+        for word in lexicon.values():
+            self.assertIs(lexicon.by_id(word.id), word)
+
+        for word in lexicon.values():
+            self.assertIn(word, lexicon.by_form(get_latin(word)))
+            self.assertIn(word, lexicon.by_form(get_ipa(word), 'ipa'))
+        red = words[2]
+        latin = get_latin(red)
+
+        # indexes follow changes
+        red.lemma = red.lemma + red.lemma
+        lexicon.reindex(('red', 'JJ'))
+        self.assertNotIn(red, lexicon.by_form(latin))
+        self.assertIn(red, lexicon.by_form(get_latin(red)))
+
+        del lexicon[('red', 'JJ')]
+        self.assertNotIn(('red', 'JJ'), lexicon)
+        self.assertEqual(lexicon.by_pos('JJ'), [])
+        self.assertIsNone(lexicon.by_id(red.id))
+        self.assertNotIn(red, lexicon.by_form(get_latin(red)))
+
+        new = lang.get_word('JJ', 'blue')
+        self.assertNotIn(new.id, ids)
+
+
+    def test_unique_forms(self):
+        ''' no two words sound the same '''
+        for forms in [True, BloomFilter(capacity=1000)]:
+            lang = Language(seed=8, unique_forms=forms)
+            # short words, so that collisions are common
+            lang.syllable_stats = {'syllables_mode': 1, 'syllables_stdv': 0}
+            for i in range(100):
+                lang.get_word('NN', 'word%d' % i)
+            lang.get_words([('VB', 'verb%d' % i) for i in range(100)])
+
+            spoken = set(b''.join(w.lemma_ids) \
+                         for w in lang.dictionary.values())
+            self.assertEqual(len(spoken), 200)
+
+            stats = lang.get_stats()['forms']
+            self.assertTrue(stats['collisions'] > 0)
+            self.assertTrue(stats['retries'] >= stats['collisions'])
+
+            # a saved language still keeps new words from sounding the same
+            copied = snapshot.loads(snapshot.dumps(lang))
+            self.assertEqual(copied.get_stats()['forms'], stats)
+            for i in range(100):
+                copied.get_word('JJ', 'adjective%d' % i)
+            spoken = set(b''.join(w.lemma_ids) \
+                         for w in copied.dictionary.values())
+            self.assertEqual(len(spoken), 300)
+
+        self.assertNotIn('forms', Language().get_stats())
+        self.assertNotIn('forms', snapshot.loads(
+            snapshot.dumps(Language(seed=8))).get_stats())
+
+        # words read from a shared lexicon claim their forms too
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'words.db')
+            first = Language(seed=8)
+            first.open_shared(path)
+            first.get_words([('NN', 'cat'), ('NN', 'dog')])
+            second = Language(seed=8, unique_forms=True)
+            second.open_shared(path)
+            self.assertIn(second.get_word('NN', 'cat').lemma_ids,
+                          second.forms)
+            self.assertIn(second.get_words([('NN', 'dog')])[0].lemma_ids,
+                          second.forms)
+
+
+    def test_bloom_filter(self):
+        ''' approximate set membership '''
+        bloom = BloomFilter(capacity=500, error_rate=0.01)
+        items = [str(i).encode() for i in range(500)]
+        for item in items:
+            bloom.add(item)
+        for item in items:
+            self.assertIn(item, bloom)
+        false_positives = sum(1 for i in range(500, 5500) \
+                              if str(i).encode() in bloom)
+        self.assertTrue(false_positives < 200)
+
+
+    def test_edit_distance(self):
+        ''' phoneme edit distance '''
+        self.assertEqual(edit_distance(b'abc', b'abc'), 0)
+        self.assertEqual(edit_distance(b'abc', b'abd'), 1)
+        self.assertEqual(edit_distance(b'abc', b'ac'), 1)
+        self.assertEqual(edit_distance(b'abc', b'xabc'), 1)
+        self.assertEqual(edit_distance(b'abc', b'cba'), 2)
+        self.assertEqual(edit_distance(b'abcdef', b'a', limit=2), 3)
+        for (first, second) in [(b'abc', b'abc'), (b'abc', b'abd'),
+                                (b'abc', b'ac'), (b'abc', b'xabc'),
+                                (b'abc', b'cba'), (b'abc', b'a')]:
+            self.assertEqual(distance_within_one(first, second),
+                             min(edit_distance(first, second), 2))
+
+        index = NeighborIndex(max_distance=2)
+        for (i, sequence) in enumerate([b'abc', b'abd', b'bd', b'xyz']):
+            index.add(sequence, i)
+        self.assertEqual(index.search(b'abc', 1), [(0, 0), (1, 1)])
+        self.assertEqual(sorted(index.search(b'abc', 2)),
+                         [(0, 0), (1, 1), (2, 2)])
+        index.remove(b'abd', 1)
+        self.assertEqual(index.search(b'abc', 1), [(0, 0)])
+        with self.assertRaises(ValueError):
+            index.search(b'abc', 3)
+
+
+    def test_similar_words(self):
+        ''' finding and avoiding minimal pairs '''
+        lang = Language(seed=13)
+        words = lang.get_words([('NN', 'word%d' % i) for i in range(200)])
+        for word in words[:20]:
+            sequence = b''.join(word.lemma_ids)
+            expected = [w for w in words if w is not word and edit_distance(
+                sequence, b''.join(w.lemma_ids)) <= 1]
+            self.assertEqual(set(lang.similar(word, 1)), set(expected))
+
+        lang = Language(seed=13, reject_similar=1)
+        lang.syllable_stats = {'syllables_mode': 2, 'syllables_stdv': 0}
+        for i in range(60):
+            lang.get_word('NN', 'word%d' % i)
+        words = lang.get_words([('VB', 'verb%d' % i) for i in range(60)])
+        sequences = [b''.join(w.lemma_ids) for w in lang.dictionary.values()]
+        for (i, first) in enumerate(sequences):
+            for second in sequences[i + 1:]:
+                self.assertTrue(edit_distance(first, second) > 1)
+        self.assertIn('similar', lang.get_stats())
+
+        # a saved language still keeps new words apart
+        copied = snapshot.loads(snapshot.dumps(lang))
+        self.assertEqual(copied.reject_similar, 1)
+        self.assertEqual(copied.get_stats()['similar'],
+                         lang.get_stats()['similar'])
+        for i in range(30):
+            copied.get_word('JJ', 'adjective%d' % i)
+        sequences = [b''.join(w.lemma_ids) for w in copied.dictionary.values()]
+        for (i, first) in enumerate(sequences):
+            for second in sequences[i + 1:]:
+                self.assertTrue(edit_distance(first, second) > 1)
+        self.assertNotIn('similar', snapshot.loads(
+            snapshot.dumps(Language(seed=13))).get_stats())
+
+
+    def test_translate_stream(self):
+        ''' translating a tagged text as a stream '''
+        lang = Language(seed=14)
+        tokens = [('The', 'DT'), ('cat', 'NNS'), ('sleep', 'VBD'),
+                  ('.', '.'), ('the', 'DT'), ('cat', 'NN'), ('sleep', 'VBZ'),
+                  ('cat', 'NN', ['plural']), (',', ',')]
+        text = ''.join(lang.translate_stream(iter(tokens), chunk_size=2))
+
+        the = get_latin(lang.get_word('DT', 'the'))
+        cat = lang.get_word('NN', 'cat')
+        cats = lang.syllables.phonemes.render(lang.inflect(cat, ['plural']))
+        slept = lang.syllables.phonemes.render(
+            lang.inflect(lang.get_word('VB', 'sleep'), ['past']))
+        sleeps = lang.syllables.phonemes.render(
+            lang.inflect(lang.get_word('VB', 'sleep'), ['present']))
+        self.assertEqual(text, '%s %s %s. %s %s %s %s,' % (
+            the[:1].upper() + the[1:], cats, slept, the, get_latin(cat),
+            sleeps, cats))
+
+        # the input is read lazily, so an endless text can be streamed
+        def endless():
+            while True:
+                yield ('word', 'NN')
+        chunks = lang.translate_stream(endless(), chunk_size=10)
+        first = next(chunks)
+        self.assertEqual(first.split(), [get_latin(lang.get_word(
+            'NN', 'word'))] * 10)
+        self.assertTrue(next(chunks).startswith(' '))
+
+        # opening punctuation goes against the word after it
+        tokens = [('run', 'VB'), ('(', '-LRB-'), ('fast', 'RB'),
+                  (')', '-RRB-'), ('``', '``'), ('yes', 'UH'), ("''", "''"),
+                  ('$', '$'), ('5', 'CD'), ('.', '.')]
+        run, fast, yes, five = [get_latin(lang.get_word(tokens[i][1],
+                                                        tokens[i][0])) \
+                                for i in [0, 2, 5, 8]]
+        self.assertEqual(''.join(lang.translate_stream(iter(tokens))),
+                         '%s (%s) ``%s\'\' $%s.' % (run, fast, yes, five))
+
+
+    def test_server(self):
+        ''' the word service and its cache of languages '''
+        cache = server.LanguageCache(capacity=2)
+        for seed in range(3):
+            cache.add(seed, Language(seed=seed))
+        self.assertNotIn(0, cache)
+        self.assertIsNone(cache.get(0))
+        self.assertIsNotNone(cache.get(1))
+        cache.add(3, Language(seed=3))
+        self.assertEqual(list(cache.languages), [1, 3])
+        self.assertEqual(cache.get_stats()['evictions'], 2)
+
+        cache = server.LanguageCache(max_bytes=cache.base_size * 3)
+        for seed in range(5):
+            cache.add(seed, Language(seed=seed))
+        self.assertEqual(len(cache), 3)
+        cache.get(4).get_words([('NN', 'word%d' % i) for i in range(100)])
+        cache.account(4)
+        self.assertEqual(list(cache.languages), [4])
+
+        async def requests():
+            service = server.WordService(bulk_size=1)
+            word = await service.dispatch(
+                'GET', '/word?seed=5&pos=NN&translation=fish', b'')
+            phrase = await service.dispatch(
+                'GET', '/phrase?seed=5&translation=los%20gatos&'
+                'words=DT:los,NN:gatos', b'')
+            forms = await service.dispatch(
+                'POST', '/render', b'{"seed": 5, "script": "ipa", '
+                b'"entries": [["NN", "fish"], ["VB", "swim"]]}')
+            missing = await service.dispatch('GET', '/word?seed=5', b'')
+            service.executor.shutdown()
+            return word, phrase, forms, missing, service
+
+        word, phrase, forms, missing, service = asyncio.run(requests())
+        # languages are built before they're cached
+        self.assertTrue(service.languages.get(5).built)
+        self.assertTrue(service.build(6).built)
+        lang = Language(seed=5)
+        fish = lang.get_word('NN', 'fish')
+        self.assertEqual(word, (200, server.describe(fish)))
+        self.assertEqual(phrase[1]['translation'], 'los gatos')
+        lang.get_phrase('NNP', [lang.get_word('DT', 'los'),
+                                lang.get_word('NN', 'gatos')], 'los gatos')
+        self.assertEqual(forms[1]['forms'], render_many(
+            lang.get_words([('NN', 'fish'), ('VB', 'swim')]), 'ipa'))
+        self.assertEqual(missing[0], 400)
+
+        # with a shared database, words that aren't in memory are looked up
+        # in the executor, and words that are stay on the event loop
+        calls = []
+
+        class Executor(server.ThreadPoolExecutor):
+            def submit(self, function, *args, **kwargs):
+                calls.append(function)
+                return super().submit(function, *args, **kwargs)
+
+        async def shared_requests(path):
+            service = server.WordService(executor=Executor(), shared=path)
+            await service.dispatch(
+                'GET', '/word?seed=5&pos=NN&translation=fish', b'')
+            built = len(calls)
+            word = await service.dispatch(
+                'GET', '/word?seed=5&pos=NN&translation=fish', b'')
+            repeated = len(calls)
+            phrase = await service.dispatch(
+                'GET', '/phrase?seed=5&translation=los%20gatos&'
+                'words=DT:los,NN:gatos', b'')
+            service.executor.shutdown()
+            return built, repeated, word, phrase
+
+        with tempfile.TemporaryDirectory() as directory:
+            built, repeated, word, phrase = asyncio.run(
+                shared_requests(os.path.join(directory, 'shared.db')))
+        # building the language, then looking up the word
+        self.assertEqual(built, 2)
+        self.assertEqual(repeated, built)
+        self.assertEqual(len(calls), built + 1)
+        # ids in a shared database are hashes, but the forms are the same
+        self.assertEqual(word[1]['ipa'], get_ipa(fish))
+        self.assertEqual(phrase[1]['latin'], get_latin(
+            lang.dictionary[('los gatos', 'NNP')]))
+
+
+    def test_max_words(self):
+        ''' a bounded dictionary gives back the same words after eviction '''
+        lang = Language(seed=16, max_words=5)
+        first = [lang.get_word('NN', 'word%d' % i) for i in range(5)]
+        phrase = lang.get_phrase('NNP', first[:2], 'phrase')
+        self.assertEqual(len(lang.dictionary), 5)
+        self.assertNotIn(('word0', 'NN'), lang.dictionary)
+
+        lang.get_words([('VB', 'verb%d' % i) for i in range(10)])
+        again = [lang.get_word('NN', 'word%d' % i) for i in range(5)]
+        for (old, new) in zip(first, again):
+            self.assertIsNot(old, new)
+            self.assertEqual(new.id, old.id)
+            self.assertEqual(new.lemma_ids, old.lemma_ids)
+        self.assertEqual(get_latin(lang.get_word('NNP', 'phrase')),
+                         get_latin(phrase))
+
+        # the same seed gives the same words, whatever else was asked for
+        other = Language(seed=16, max_words=100)
+        other.get_word('JJ', 'red')
+        self.assertEqual(get_latin(other.get_word('NN', 'word3')),
+                         get_latin(first[3]))
+
+        stats = lang.get_stats()['dictionary']
+        self.assertEqual(stats['words'], 5)
+        self.assertTrue(stats['evictions'] > 0 and stats['misses'] > 0)
+        lang.get_word('NN', 'word4')
+        self.assertEqual(lang.get_stats()['dictionary']['hits'],
+                         stats['hits'] + 1)
+
+        loaded = snapshot.loads(snapshot.dumps(lang))
+        self.assertEqual(loaded.dictionary.capacity, 5)
+        self.assertEqual(get_latin(loaded.get_word('NNP', 'phrase')),
+                         get_latin(phrase))
+        self.assertEqual(get_latin(loaded.get_word('NN', 'word0')),
+                         get_latin(first[0]))
+
+        # definitions survive eviction, however they were set
+        lang = Language(seed=16, max_words=3)
+        lang.get_word('NN', 'cat', 'a small cat')
+        lang.get_word('NN', 'dog').set_definition('a loyal dog')
+        lang.get_words([('VB', 'verb%d' % i) for i in range(5)])
+        self.assertNotIn(('cat', 'NN'), lang.dictionary)
+        self.assertEqual(lang.get_word('NN', 'cat').definition, 'a small cat')
+        lang.get_words([('VB', 'verb%d' % i) for i in range(5, 10)])
+        loaded = snapshot.loads(snapshot.dumps(lang))
+        for language in [lang, loaded]:
+            self.assertEqual(language.get_word('NN', 'dog').definition,
+                             'a loyal dog')
+            self.assertEqual(language.get_word('NN', 'cat').definition,
+                             'a small cat')
+
+        # and only the most recent phrases are kept
+        for i in range(10):
+            lang.get_phrase('NNP', first[:2], 'phrase%d' % i)
+        self.assertEqual(list(lang.phrases),
+                         [('phrase%d' % i, 'NNP') for i in range(7, 10)])
+
+        with self.assertRaises(ValueError):
+            Language(max_words=5, unique_forms=True)
+
+
+    def test_stateless(self):
+        ''' stateless words don't depend on the order they're asked for '''
+        entries = [(pos, 'word%d' % i) for i in range(50) \
+                   for pos in ['NN', 'VB', 'JJ']]
+        shuffled = entries[:]
+        random.Random(17).shuffle(shuffled)
+
+        first = Language(seed=17, stateless=True)
+        forward = {(t, p): first.get_word(p, t) for (p, t) in entries}
+        second = Language(seed=17, stateless=True)
+        second.get_word('NN', 'something else')
+        second.get_words(shuffled[:70])
+        backward = {(t, p): second.get_word(p, t) \
+                    for (p, t) in reversed(shuffled)}
+
+        for (key, word) in forward.items():
+            self.assertEqual(backward[key].lemma_ids, word.lemma_ids)
+            self.assertEqual(backward[key].id, word.id)
+            self.assertEqual(get_latin(backward[key]), get_latin(word))
+
+        # but it's still a different language with a different seed
+        other = Language(seed=18, stateless=True)
+        self.assertNotEqual(
+            [get_latin(other.get_word(p, t)) for (p, t) in entries],
+            [get_latin(forward[(t, p)]) for (p, t) in entries])
+        self.assertTrue(snapshot.loads(snapshot.dumps(first)).stateless)
+
+
+    def test_lazy_build(self):
+        ''' the phonology and grammar are drawn on first use '''
+        lazy = Language(seed=18)
+        self.assertFalse(lazy.built)
+        self.assertNotIn('syllables', lazy.__dict__)
+        eager = Language(seed=18).build()
+        self.assertTrue(eager.built)
+
+        self.assertEqual(get_ipa(lazy.get_word('NN', 'fish')),
+                         get_ipa(eager.get_word('NN', 'fish')))
+        self.assertEqual([r.tags for r in lazy.rules],
+                         [r.tags for r in eager.rules])
+
+        # setting one of them first still draws the rest the same way
+        lazy = Language(seed=18)
+        lazy.syllable_stats = eager.syllable_stats
+        self.assertEqual(lazy.get_stats(), eager.get_stats())
+
+        spec = json.loads(json.dumps(eager.get_spec()))
+        loaded = Language.from_spec(spec)
+        self.assertEqual(len(loaded.dictionary), 0)
+        self.assertEqual(get_ipa(loaded.get_word('VB', 'swim')),
+                         get_ipa(eager.get_word('VB', 'swim')))
+        self.assertEqual(loaded.get_spec(), eager.get_spec())
+
+
+    def test_instruments(self):
+        ''' counting and timing what a language does '''
+        plain = Language(seed=20)
+        self.assertEqual(plain.get_metrics(), {})
+        self.assertNotIn('get_word', plain.__dict__)
+
+        lang = Language(seed=20)
+        lang.instrument()
+        lang.get_word('NN', 'fish')
+        lang.get_word('NN', 'fish')
+        lang.get_words([('VB', 'run'), ('NN', 'fish'), ('VB', 'run')])
+        get_latin(lang.get_word('VB', 'run'))
+
+        metrics = lang.get_metrics()
+        self.assertEqual(metrics['counters']['words_generated'], 2)
+        self.assertEqual(metrics['counters']['cache_hits'], 4)
+        self.assertTrue(metrics['counters']['syllables_drawn'] >= 2)
+        for timer in ['get_syllable', 'get_syllables', 'inflect', 'render']:
+            self.assertTrue(metrics['timers'][timer]['calls'] > 0)
+        self.assertEqual(len(metrics['rules']), len(lang.rules))
+        for (rule, counts) in zip(lang.rules, metrics['rules']):
+            self.assertEqual(counts['tags'], rule.tags)
+            self.assertEqual(counts['evaluated'], 2)
+            self.assertEqual(counts['applied'] > 0,
+                             rule.tags in [['NN'], ['VB']])
+
+        # measuring doesn't change the words
+        self.assertEqual(get_ipa(lang.get_word('NN', 'fish')),
+                         get_ipa(plain.get_word('NN', 'fish')))
+
+        lang.reset_metrics()
+        self.assertEqual(lang.get_metrics()['counters']['cache_hits'], 0)
+        lang.instrument(False)
+        self.assertEqual(lang.get_metrics(), {})
+        self.assertNotIn('get_word', lang.__dict__)
+        self.assertNotIn('render', lang.syllables.phonemes.__dict__)
+
+
+    def test_syllable_inventory(self):
+        ''' drawing syllables from a table of every possible syllable '''
+        syllables = Syllables(random.Random(21))
+        inventory = syllables.use_inventory()
+        self.assertAlmostEqual(sum(inventory.probabilities), 1)
+        self.assertEqual(len(set(inventory.indexes)), len(inventory))
+        self.assertTrue(0 < inventory.get_entropy() <=
+                        math.log2(len(inventory)))
+
+        # draws are shared syllables, at their exact frequencies
+        rng = random.Random(21)
+        drawn = [syllables.get_syllable(rng) for _ in range(20000)]
+        self.assertTrue(all(s in inventory.syllables for s in drawn[:100]))
+        common = max(inventory.syllables, key=inventory.get_probability)
+        frequency = sum(1 for s in drawn if s is common) / len(drawn)
+        self.assertAlmostEqual(frequency, inventory.get_probability(common),
+                               delta=0.01)
+
+        batch = syllables.get_syllables(50)
+        self.assertTrue(all(inventory.get_probability(batch[i]) > 0 \
+                            for i in range(50)))
+
+        self.assertTrue(inventory.get_collision_rate(10, 3) <
+                        inventory.get_collision_rate(100, 3) <
+                        inventory.get_collision_rate(100, 2))
+
+        lang = Language(seed=21, syllable_inventory=True)
+        word = lang.get_word('NN', 'fish')
+        self.assertEqual(get_ipa(word),
+                         get_ipa(Language(seed=21, syllable_inventory=True)
+                                 .get_word('NN', 'fish')))
+        loaded = snapshot.loads(snapshot.dumps(lang), Language)
+        self.assertIsNotNone(loaded.syllables.inventory)
+        self.assertEqual(lang.get_stats()['syllables']['count'],
+                         len(lang.syllables.inventory))
+
+
+    def test_paradigms(self):
+        ''' every inflected form of a word '''
+        lang = Language(seed=22)
+        noun = lang.get_word('NN', 'cat')
+        verb = lang.get_word('VB', 'run')
+        noun_forms, verb_forms = lang.paradigms([noun, verb])
+
+        self.assertEqual(list(noun_forms)[0], ())
+        self.assertIn(('plural',), noun_forms)
+        self.assertIn(('present',), verb_forms)
+        self.assertNotIn(('past',), noun_forms)
+        for (word, forms) in [(noun, noun_forms), (verb, verb_forms)]:
+            self.assertEqual(forms[()], word.lemma_ids)
+            for (tags, form) in forms.items():
+                self.assertEqual(form, lang.inflect(word, tags))
+
+        texts = lang.paradigms([noun], 'latin')[0]
+        self.assertEqual(texts[()], get_latin(noun))
+        self.assertEqual(list(texts), list(noun_forms))
+
+        # inflecting doesn't change the word's own tags
+        base_tags = list(noun.base_tags)
+        noun.inflect(lang.rules, ['plural'])
+        noun.inflect(lang.rules, ['plural'])
+        self.assertEqual(noun.base_tags, base_tags)
+
+        # forms are remembered, until the rules change
+        forms = noun.forms[2]
+        lang.paradigms([noun])
+        self.assertIs(noun.forms[2], forms)
+        lang.rules = lang.rules + [Affix(['NN', 'plural'],
+                                         lang.syllables.get_syllable())]
+        changed = lang.paradigms([noun])[0]
+        self.assertIsNot(noun.forms[2], forms)
+        self.assertEqual(changed[('plural',)][:-1], noun_forms[('plural',)])
+
+
+    def test_export(self):
+        ''' streaming words out to JSON lines, CSV, and SQLite '''
+        lang = Language(seed=24)
+        lang.get_words([('NN', 'cat'), ('VB', 'run'), ('JJ', 'red'),
+                        ('NN', 'dog'), ('VB', 'swim')])
+        lang.dictionary[('cat', 'NN')].set_definition('a "small" cat, or\nso')
+        words = list(lang.dictionary.values())
+        paradigms = lang.paradigms(words, 'latin')
+
+        output = io.StringIO()
+        self.assertEqual(export.write_jsonl(output, iter(words), lang,
+                                            chunk_size=2), 5)
+        rows = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([r['translation'] for r in rows],
+                         [w.translation for w in words])
+        for (row, word, paradigm) in zip(rows, words, paradigms):
+            self.assertEqual(row['latin'], get_latin(word))
+            self.assertEqual(row['ipa'], get_ipa(word))
+            self.assertEqual(row['display_pos'], word.display_pos)
+            self.assertEqual({tuple(f['tags']): f['latin'] \
+                              for f in row['paradigm']},
+                             {t: f for (t, f) in paradigm.items() if t})
+
+        output = io.StringIO(newline='')
+        export.write_csv(output, words, chunk_size=3)
+        output.seek(0)
+        rows = list(csv.DictReader(output))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['definition'], 'a "small" cat, or\nso')
+        self.assertEqual([r['ipa'] for r in rows],
+                         [get_ipa(w) for w in words])
+
+        connection = sqlite3.connect(':memory:')
+        export.write_sqlite(connection, words, lang, chunk_size=2)
+        self.assertEqual(
+            connection.execute('SELECT latin FROM words').fetchall(),
+            [(get_latin(w),) for w in words])
+        verb = words.index(lang.dictionary[('run', 'VB')])
+        forms = connection.execute(
+            'SELECT tags, latin FROM forms WHERE word_id = ? ORDER BY rowid',
+            (words[verb].id,)).fetchall()
+        self.assertEqual(forms, [(' '.join(t), f) for (t, f) in \
+                                 paradigms[verb].items() if t])
+
+        # exporting again replaces the rows rather than adding to them
+        counts = [connection.execute('SELECT COUNT(*) FROM %s' % t).fetchone()
+                  for t in ['words', 'forms']]
+        export.write_sqlite(connection, words, lang)
+        self.assertEqual(
+            [connection.execute('SELECT COUNT(*) FROM %s' % t).fetchone()
+             for t in ['words', 'forms']], counts)
+
+        # the words of another language are kept apart, though their ids
+        # are the same
+        other = Language(seed=25)
+        other.get_words([('NN', 'cat'), ('VB', 'run')])
+        export.write_sqlite(connection, other.dictionary.values(), other)
+        self.assertEqual(connection.execute(
+            'SELECT latin FROM words WHERE seed = ?', ('24',)).fetchall(),
+            [(get_latin(w),) for w in words])
+        self.assertEqual(connection.execute(
+            'SELECT latin FROM words WHERE seed = ?', ('25',)).fetchall(),
+            [(get_latin(w),) for w in other.dictionary.values()])
+
+        # and the forms aren't remembered on the words
+        lang = Language(seed=24)
+        word = lang.get_word('VB', 'run')
+        export.write_jsonl(io.StringIO(), [word], lang)
+        self.assertIsNone(word.forms)
+
+
+    def test_shared_lexicon(self):
+        ''' processes sharing the words of a language through SQLite '''
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'words.db')
+            first = Language(seed=25)
+            first.open_shared(path)
+            cat = first.get_word('NN', 'cat', 'a small cat')
+
+            # a worker that draws other words first still gets the same cat
+            second = Language(seed=25)
+            second.get_word('VB', 'run')
+            self.assertNotEqual(get_ipa(second.get_word('NN', 'cat')),
+                                get_ipa(cat))
+            second = Language(seed=25)
+            lexicon = second.open_shared(path)
+            second.get_word('VB', 'run')
+            shared_cat = second.get_word('NN', 'cat')
+            self.assertEqual(get_ipa(shared_cat), get_ipa(cat))
+            self.assertEqual(shared_cat.id, cat.id)
+            self.assertEqual(shared_cat.definition, 'a small cat')
+            self.assertIs(second.get_word('NN', 'cat'), shared_cat)
+
+            # batches insert what's new and read back what isn't
+            words = second.get_words([('NN', 'cat'), ('NN', 'dog'),
+                                      ('VB', 'swim')])
+            self.assertIs(words[0], shared_cat)
+            self.assertEqual(first.get_words([('VB', 'swim'), ('NN', 'dog')]),
+                             [first.get_word('VB', 'swim'),
+                              first.get_word('NN', 'dog')])
+            self.assertEqual(get_ipa(first.get_word('NN', 'dog')),
+                             get_ipa(words[1]))
+            self.assertEqual(len(lexicon), 4)
+            self.assertIn(('run', 'VB'), lexicon)
+
+            # in another process
+            script = 'from foreigntongue import Language, get_ipa;' \
+                     'lang = Language(seed=25);' \
+                     'lang.open_shared(%r);' \
+                     'lang.get_word("JJ", "red");' \
+                     'print(get_ipa(lang.get_word("NN", "cat")))' % path
+            root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            output = subprocess.check_output([sys.executable, '-c', script],
+                                             env={'PYTHONPATH': root})
+            self.assertEqual(output.decode('utf-8').strip(), get_ipa(cat))
+            self.assertEqual(len(lexicon), 5)
+
+            # other languages keep their own words
+            other = Language(seed=26)
+            other.open_shared(path)
+            self.assertIsNone(other.shared.get('cat', 'NN',
+                                               other.syllables.phonemes))
+            with self.assertRaises(ValueError):
+                Language().open_shared(path)
+            lexicon.close()
+
 
 if __name__ == '__main__':
     unittest.main()